@@ -6,9 +6,17 @@ and gather intelligence about their methods.
 """
 
 from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
 from datetime import datetime
+from typing import Dict, List, Optional
+import asyncio
 import logging
+import os
+import re
+
+import orjson
+
+from app.core.clock import utc_isoformat
 
 router = APIRouter()
 
@@ -16,146 +24,331 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
-@router.post("/interact")
-async def honeypot_interaction(request: Request):
-    """AI-powered honeypot endpoint that simulates a vulnerable server"""
-    try:
-        data = await request.json()
-        attacker_input = data.get("input", "").strip()
-        session_id = data.get("session_id", "unknown")
-        
-        # Log the attacker's activity
-        logger.info(f"[HONEYPOT] Session: {session_id} | Input: {attacker_input}")
-        
-        if not attacker_input:
-            return JSONResponse({
-                "success": True,
-                "response": "[ERROR] No command provided"
-            })
-        
-        # Generate rule-based response
-        ai_response = generate_honeypot_response(attacker_input, session_id)
-        
-        # Log the response
-        logger.info(f"[HONEYPOT] Session: {session_id} | Response: {ai_response[:100]}...")
-        
-        return JSONResponse({
-            "success": True,
-            "response": ai_response,
-            "timestamp": datetime.utcnow().isoformat()
-        })
-        
-    except Exception as e:
-        logger.error(f"[HONEYPOT ERROR] {str(e)}")
-        return JSONResponse({
-            "success": False,
-            "error": "Internal server error"
-        }, status_code=500)
-
-
-def generate_honeypot_response(command: str, session_id: str) -> str:
-    """
-    Generate realistic server responses to commands.
-    This is a rule-based system. You can later replace with OpenAI/Claude API.
-    """
-    cmd_lower = command.lower().strip()
-    
-    # Help command
-    if cmd_lower in ['help', '--help', '-h']:
-        return """Available commands:
+# Static command outputs
+HELP_OUTPUT = """Available commands:
 ls, cd, pwd, cat, whoami, id, ps, netstat, ifconfig, mysql, psql, exit
 Type any Linux command to interact with the system."""
-    
-    # Directory listing
-    elif cmd_lower == 'ls' or cmd_lower.startswith('ls '):
-        return """drwxr-xr-x 2 root root 4096 Oct 15 12:34 config
+
+LS_OUTPUT = """drwxr-xr-x 2 root root 4096 Oct 15 12:34 config
 drwxr-xr-x 3 www-data www-data 4096 Oct 20 08:22 logs
 -rw-r--r-- 1 root root 1834 Oct 10 14:55 database.conf
 -rw-r--r-- 1 root root 892 Sep 30 09:12 secrets.txt
 drwxr-xr-x 5 root root 4096 Oct 25 16:41 backups"""
-    
-    # Present working directory
-    elif cmd_lower == 'pwd':
-        return "/var/www/shield-backend"
-    
-    # User info
-    elif cmd_lower == 'whoami':
-        return "root"
-    
-    elif cmd_lower == 'id':
-        return "uid=0(root) gid=0(root) groups=0(root)"
-    
-    # File reading
-    elif cmd_lower.startswith('cat '):
-        filename = command[4:].strip()
-        if 'secret' in filename.lower() or 'password' in filename.lower():
-            return """[SECRETS FILE]
+
+PWD_OUTPUT = "/var/www/shield-backend"
+
+WHOAMI_OUTPUT = "root"
+
+ID_OUTPUT = "uid=0(root) gid=0(root) groups=0(root)"
+
+SECRETS_FILE_OUTPUT = """[SECRETS FILE]
 DB_PASSWORD=admin123_temp
 API_KEY=sk-test-abc123def456
 JWT_SECRET=supersecret_change_me
 ADMIN_TOKEN=Bearer eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9..."""
-        elif 'database' in filename.lower() or 'config' in filename.lower():
-            return """[DATABASE CONFIG]
+
+DATABASE_CONFIG_OUTPUT = """[DATABASE CONFIG]
 HOST=localhost
 PORT=5432
 DATABASE=shield_db
 USERNAME=admin
 PASSWORD=admin123_temp
 SSL_MODE=disable"""
-        else:
-            return f"cat: {filename}: No such file or directory"
-    
-    # Process listing
-    elif cmd_lower in ['ps', 'ps aux']:
-        return """USER       PID %CPU %MEM    VSZ   RSS TTY      STAT START   TIME COMMAND
+
+PS_OUTPUT = """USER       PID %CPU %MEM    VSZ   RSS TTY      STAT START   TIME COMMAND
 root         1  0.0  0.1  16840  3892 ?        Ss   Oct25   0:02 /sbin/init
 www-data  1234  0.5  2.1 245680 43892 ?        Sl   08:00   1:23 /usr/bin/python3 app.py
 postgres  5678  0.2  1.8 123456 37284 ?        Ss   Oct25   2:34 /usr/lib/postgresql/14/bin/postgres"""
-    
-    # Network info
-    elif cmd_lower in ['netstat', 'netstat -tulpn']:
-        return """Active Internet connections (only servers)
+
+NETSTAT_OUTPUT = """Active Internet connections (only servers)
 Proto Recv-Q Send-Q Local Address           Foreign Address         State       PID/Program
 tcp        0      0 0.0.0.0:22              0.0.0.0:*               LISTEN      892/sshd
 tcp        0      0 0.0.0.0:80              0.0.0.0:*               LISTEN      1234/nginx
 tcp        0      0 127.0.0.1:5432          0.0.0.0:*               LISTEN      5678/postgres"""
-    
-    # Database access attempts
-    elif 'mysql' in cmd_lower or 'psql' in cmd_lower:
-        return """[WARNING] Database access detected
+
+DATABASE_SHELL_OUTPUT = """[WARNING] Database access detected
 Connecting to PostgreSQL...
 shield_db=> (You are now connected to the database)
 Type SQL queries or 'exit' to disconnect"""
-    
-    # SQL injection attempts
-    elif 'select' in cmd_lower and 'from' in cmd_lower:
-        return """Query executed successfully:
+
+SQL_QUERY_OUTPUT = """Query executed successfully:
 id | username  | email              | role
 ---+-----------+--------------------+-------
 1  | admin     | admin@shield.io    | admin
 2  | developer | dev@shield.io      | user
 3  | guest     | guest@shield.io    | guest
 (3 rows returned)"""
-    
+
+EXIT_OUTPUT = "[SYSTEM] Connection closed. Goodbye."
+
+# Command aliases that share one output
+HELP_COMMANDS = frozenset({"help", "--help", "-h"})
+PS_COMMANDS = frozenset({"ps", "ps aux"})
+NETSTAT_COMMANDS = frozenset({"netstat", "netstat -tulpn"})
+EXIT_COMMANDS = frozenset({"exit", "quit", "logout"})
+
+# Commands whose output never changes, keyed by the lowercased command
+_STATIC_OUTPUTS: Dict[str, str] = {
+    "ls": LS_OUTPUT,
+    "pwd": PWD_OUTPUT,
+    "whoami": WHOAMI_OUTPUT,
+    "id": ID_OUTPUT,
+    **dict.fromkeys(HELP_COMMANDS, HELP_OUTPUT),
+    **dict.fromkeys(PS_COMMANDS, PS_OUTPUT),
+    **dict.fromkeys(NETSTAT_COMMANDS, NETSTAT_OUTPUT),
+    **dict.fromkeys(EXIT_COMMANDS, EXIT_OUTPUT),
+}
+
+
+def _serialize_output(output: str) -> bytes:
+    """
+    Pre-serialize a response body for a fixed output. The closing brace is
+    left off so the per-request timestamp can be appended without re-encoding.
+    """
+    return orjson.dumps({"success": True, "response": output})[:-1]
+
+
+# Pre-serialized response bodies for the static commands
+_STATIC_BODIES: Dict[str, bytes] = {
+    command: _serialize_output(output)
+    for command, output in _STATIC_OUTPUTS.items()
+}
+
+# Pre-serialized bodies for the fixed outputs of the argument/substring rules,
+# keyed by the output text returned from _dispatch_command
+_RULE_BODIES: Dict[str, bytes] = {
+    output: _serialize_output(output)
+    for output in (
+        LS_OUTPUT, SECRETS_FILE_OUTPUT, DATABASE_CONFIG_OUTPUT,
+        DATABASE_SHELL_OUTPUT, SQL_QUERY_OUTPUT,
+    )
+}
+
+# Commands that take an argument and are matched before the substring rules
+_ARGUMENT_PREFIXES = ('ls ', 'cat ')
+
+# Zero-width lookahead so overlapping keywords (e.g. "fromysql") are all found
+_SUBSTRING_RULES = re.compile(r'(?=(mysql|psql|select|from))')
+
+_NO_COMMAND_BODY = orjson.dumps({
+    "success": True,
+    "response": "[ERROR] No command provided"
+})
+
+
+@router.post("/interact")
+async def honeypot_interaction(request: Request):
+    """AI-powered honeypot endpoint that simulates a vulnerable server"""
+    try:
+        # An empty or malformed body is an error, as with request.json()
+        data = orjson.loads(await request.body())
+        attacker_input = data.get("input", "").strip()
+        session_id = data.get("session_id", "unknown")
+
+        # Log the attacker's activity
+        logger.info("[HONEYPOT] Session: %s | Input: %s", session_id, attacker_input)
+
+        if not attacker_input:
+            return Response(_NO_COMMAND_BODY, media_type="application/json")
+
+        # Serve fixed commands straight from the pre-serialized cache
+        cmd_lower = attacker_input.lower()
+        cached_body = _STATIC_BODIES.get(cmd_lower)
+        if cached_body is not None:
+            ai_response = _STATIC_OUTPUTS[cmd_lower]
+        else:
+            # Generate rule-based response (input is already stripped and lowered)
+            ai_response = _dispatch_command(attacker_input, cmd_lower)
+            cached_body = _RULE_BODIES.get(ai_response)
+
+        # Log the response
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("[HONEYPOT] Session: %s | Response: %s...", session_id, ai_response[:100])
+
+        if cached_body is not None:
+            timestamp = utc_isoformat().encode()
+            return Response(
+                cached_body + b',"timestamp":"' + timestamp + b'"}',
+                media_type="application/json"
+            )
+
+        return ORJSONResponse({
+            "success": True,
+            "response": ai_response,
+            "timestamp": utc_isoformat()
+        })
+
+    except Exception as e:
+        logger.error("[HONEYPOT ERROR] %s", e)
+        return ORJSONResponse({
+            "success": False,
+            "error": "Internal server error"
+        }, status_code=500)
+
+
+def generate_honeypot_response(command: str, session_id: str) -> str:
+    """
+    Generate realistic server responses to commands.
+    This is a rule-based system. You can later replace with OpenAI/Claude API.
+    """
+    cmd_lower = command.lower().strip()
+
+    # Fixed commands (help, pwd, whoami, ps, netstat, exit, ...)
+    output = _STATIC_OUTPUTS.get(cmd_lower)
+    if output is not None:
+        return output
+
+    return _dispatch_command(command, cmd_lower)
+
+
+def _dispatch_command(command: str, cmd_lower: str) -> str:
+    """Resolve the argument, substring and fallback rules for a non-static command."""
+    if cmd_lower.startswith(_ARGUMENT_PREFIXES):
+        # Directory listing
+        if cmd_lower.startswith('ls '):
+            return LS_OUTPUT
+
+        # File reading
+        filename = command[4:].strip()
+        filename_lower = filename.lower()
+        if 'secret' in filename_lower or 'password' in filename_lower:
+            return SECRETS_FILE_OUTPUT
+        elif 'database' in filename_lower or 'config' in filename_lower:
+            return DATABASE_CONFIG_OUTPUT
+        else:
+            return f"cat: {filename}: No such file or directory"
+
+    # Database access and SQL injection attempts, found in a single scan
+    tokens = set(_SUBSTRING_RULES.findall(cmd_lower))
+    if 'mysql' in tokens or 'psql' in tokens:
+        return DATABASE_SHELL_OUTPUT
+    if 'select' in tokens and 'from' in tokens:
+        return SQL_QUERY_OUTPUT
+
     # Change directory
-    elif cmd_lower.startswith('cd '):
+    if cmd_lower.startswith('cd '):
         path = command[3:].strip()
         return f"Changed directory to: {path}"
-    
-    # Exit
-    elif cmd_lower in ['exit', 'quit', 'logout']:
-        return "[SYSTEM] Connection closed. Goodbye."
-    
+
     # Default response for unknown commands
-    else:
-        return f"bash: {command}: command not found\nType 'help' for available commands"
+    return f"bash: {command}: command not found\nType 'help' for available commands"
 
 
 # Optional: Log to file for later analysis
+#
+# Records are queued by log_to_file() and written by a background task in
+# batches through a single long-lived O_APPEND descriptor, so request handlers
+# never block on open/write/close. The file is opened with the first batch,
+# so an app that never logs an interaction never creates it.
+HONEYPOT_LOG_FILE = 'honeypot_logs.txt'
+LOG_QUEUE_MAXSIZE = 10000
+LOG_BATCH_SIZE = 256
+LOG_FLUSH_INTERVAL = 0.05  # seconds
+
+_log_queue: Optional[asyncio.Queue] = None
+_log_writer_task: Optional[asyncio.Task] = None
+_log_fd: Optional[int] = None
+dropped_log_records = 0
+
+
 def log_to_file(session_id: str, interaction_type: str, content: str):
-    """Log honeypot interactions to file for analysis"""
+    """Queue a honeypot interaction for the background file writer"""
+    global dropped_log_records
+
+    record = f"[{datetime.utcnow()}] {session_id} | {interaction_type}: {content}\n".encode('utf-8')
+
+    if _log_queue is None:
+        # Writer not running (e.g. called outside the app) - write directly
+        _write_records([record])
+        return
+
     try:
-        with open('honeypot_logs.txt', 'a', encoding='utf-8') as f:
-            f.write(f"[{datetime.utcnow()}] {session_id} | {interaction_type}: {content}\n")
+        _log_queue.put_nowait(record)
+    except asyncio.QueueFull:
+        dropped_log_records += 1
+
+
+def _write_records(records: List[bytes]):
+    """Append a batch of records to the honeypot log in one write"""
+    try:
+        if _log_fd is not None:
+            os.write(_log_fd, b''.join(records))
+        else:
+            with open(HONEYPOT_LOG_FILE, 'ab') as f:
+                f.write(b''.join(records))
     except Exception as e:
-        logger.error(f"Failed to log to file: {e}")
+        logger.error("Failed to log to file: %s", e)
+
+
+def _drain_pending() -> List[Optional[bytes]]:
+    """Pop up to LOG_BATCH_SIZE queued items without waiting"""
+    batch = []
+    while len(batch) < LOG_BATCH_SIZE:
+        try:
+            batch.append(_log_queue.get_nowait())
+        except asyncio.QueueEmpty:
+            break
+    return batch
+
+
+async def _drain_log_queue():
+    """Background task: batch queued records and write them off the event loop"""
+    loop = asyncio.get_running_loop()
+    stopping = False
+    while not stopping:
+        first = await _log_queue.get()
+        if first is None:
+            break
+        # Give concurrent handlers a moment to add to the batch
+        await asyncio.sleep(LOG_FLUSH_INTERVAL)
+
+        batch = [first]
+        for record in _drain_pending():
+            if record is None:
+                stopping = True
+                break
+            batch.append(record)
+        await loop.run_in_executor(None, _write_batch, batch)
+
+
+def _write_batch(batch: List[bytes]):
+    """Writer task side of _write_records: opens the shared descriptor on first use"""
+    global _log_fd
+
+    if _log_fd is None:
+        try:
+            _log_fd = os.open(HONEYPOT_LOG_FILE, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        except OSError as e:
+            logger.error("Failed to open honeypot log: %s", e)
+    _write_records(batch)
+
+
+async def start_log_writer():
+    """Start the batched writer (app startup)"""
+    global _log_queue, _log_writer_task
+
+    if _log_writer_task is not None:
+        return
+    _log_queue = asyncio.Queue(maxsize=LOG_QUEUE_MAXSIZE)
+    _log_writer_task = asyncio.create_task(_drain_log_queue())
+
+
+async def stop_log_writer():
+    """Stop the batched writer and flush anything still queued (app shutdown)"""
+    global _log_queue, _log_writer_task, _log_fd
+
+    if _log_writer_task is None:
+        return
+    # None is the stop sentinel; everything queued before it gets written
+    await _log_queue.put(None)
+    await _log_writer_task
+
+    leftover = [record for record in _drain_pending() if record is not None]
+    if leftover:
+        _write_records(leftover)
+    if dropped_log_records:
+        logger.warning("[HONEYPOT] Dropped %d log records (queue full)", dropped_log_records)
+
+    if _log_fd is not None:
+        os.close(_log_fd)
+    _log_queue = _log_writer_task = _log_fd = None
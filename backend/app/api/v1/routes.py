@@ -7,18 +7,21 @@ Includes the main analysis endpoint and job status checking.
 
 import asyncio
 import logging
-import uuid
+import secrets
+import time
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from fastapi.responses import JSONResponse
+import orjson
+from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi.responses import Response
 
 from app.models.schemas import (
     AnalysisRequest, AnalysisResponse, JobStatus, ErrorResponse,
-    AnalysisResult, HoneypotRedirect
+    AnalysisResult, HoneypotRedirect, ThreatDetection, AttackType, ThreatLevel
 )
 from app.services.analysis import analysis_service
+from app.core.clock import utc_isoformat
 from app.core.config import settings
 from app.api.v1.honeypot import router as honeypot_router
 
@@ -33,11 +36,57 @@ api_router = APIRouter(tags=["Security Analysis"])
 api_router.include_router(honeypot_router, prefix="/honeypot", tags=["Honeypot"])
 
 
+# Progress reported by /status for each job status
+_PROGRESS: Dict[str, float] = {
+    "pending": 0.0,
+    "processing": 0.5,
+    "completed": 1.0,
+    "failed": 1.0
+}
+
+
 def generate_job_id() -> str:
     """Generate a unique job ID."""
-    timestamp = int(datetime.utcnow().timestamp())
-    unique_id = uuid.uuid4().hex[:8]
-    return f"analysis_{timestamp}_{unique_id}"
+    return f"analysis_{time.time_ns() // 1_000_000_000}_{secrets.token_hex(4)}"
+
+
+def _store_failed_job(job_id: str, job_data: Optional[dict], error: Exception) -> None:
+    """Record a job that did not complete, if it was registered as in flight."""
+    if job_data is None:
+        return
+    job_data.update({
+        "status": "failed",
+        "completed_at": datetime.utcnow(),
+        "error": str(error)
+    })
+    analysis_service.store_job(job_id, job_data)
+
+
+async def _engage_honeypot(job_id: str, attacker_input: str, session_id: str) -> None:
+    """Engage the honeypot for a malicious job and record the session on the stored job."""
+    try:
+        honeypot_redirect = await analysis_service.honeypot_engagement_stub(
+            attacker_input=attacker_input,
+            session_id=session_id
+        )
+    except Exception as e:
+        logger.error("Honeypot engagement failed for job %s: %s", job_id, e)
+        return
+
+    job_data = analysis_service.get_job(job_id)
+    if job_data is not None:
+        job_data["honeypot_redirect"] = honeypot_redirect.dict()
+        job_data["result"].update({
+            "honeypot_triggered": True,
+            "honeypot_session_id": honeypot_redirect.session_id
+        })
+        analysis_service.store_job(job_id, job_data)
+
+    # Log honeypot activation
+    security_logger.warning(
+        "Honeypot activated - Job: %s, Session: %s",
+        job_id, honeypot_redirect.session_id
+    )
 
 
 @api_router.post(
@@ -68,37 +117,42 @@ async def analyze_input(
     
     Args:
         request: The analysis request containing input type and content
-        background_tasks: FastAPI background tasks for async processing
+        background_tasks: Runs honeypot engagement after the response is sent
         
     Returns:
-        AnalysisResponse with results or honeypot redirection
+        AnalysisResponse with results; honeypot_pending is set when engagement was scheduled
         
     Raises:
         HTTPException: If validation fails or processing errors occur
     """
+    content_length = len(request.content)
     job_id = generate_job_id()
+    job_data = None
     
     try:
         # Log incoming request
-        logger.info(f"Analysis request {job_id} - Type: {request.input_type}")
+        logger.info("Analysis request %s - Type: %s", job_id, request.input_type)
         security_logger.info(
-            f"Analysis started - Job: {job_id}, Type: {request.input_type}, "
-            f"IP: {request.ip_address}, Content length: {len(request.content)}"
+            "Analysis started - Job: %s, Type: %s, IP: %s, Content length: %d",
+            job_id, request.input_type, request.ip_address, content_length
         )
         
-        # Store job for tracking
+        # Track the job as in flight; it is only written to the store once it finishes
         job_data = {
             "job_id": job_id,
             "status": "processing",
             "created_at": datetime.utcnow(),
-            "request": request.dict(),
+            # Request summary only - avoids copying large content (e.g. base64 images)
+            "input_type": request.input_type,
+            "ip_address": request.ip_address,
+            "content_length": content_length,
         }
-        analysis_service.store_job(job_id, job_data)
+        analysis_service.mark_in_flight(job_id, job_data["created_at"])
         
         # Perform analysis
         analysis_result = await analysis_service.analyze_input(request)
         
-        # Update job status
+        # Store the completed job
         job_data.update({
             "status": "completed",
             "completed_at": datetime.utcnow(),
@@ -114,59 +168,47 @@ async def analyze_input(
         )
         
         # Phase 2 Integration Point: Honeypot Engagement
+        # Runs after the response is sent; clients poll /status/{job_id} for the session and redirect_url
         if analysis_result.is_malicious and settings.HONEYPOT_ENABLED:
-            try:
-                honeypot_redirect = await analysis_service.honeypot_engagement_stub(
-                    attacker_input=request.content,
-                    session_id=request.session_id or job_id
-                )
-                
-                response.honeypot_redirect = honeypot_redirect
-                analysis_result.honeypot_triggered = True
-                analysis_result.honeypot_session_id = honeypot_redirect.session_id
-                
-                # Log honeypot activation
-                security_logger.warning(
-                    f"Honeypot activated - Job: {job_id}, Session: {honeypot_redirect.session_id}"
-                )
-                
-            except Exception as e:
-                logger.error(f"Honeypot engagement failed for job {job_id}: {str(e)}")
-                # Continue without honeypot if it fails
+            background_tasks.add_task(
+                _engage_honeypot, job_id, request.content, request.session_id or job_id
+            )
+            response.honeypot_pending = True
         
         # Log completion
         logger.info(
-            f"Analysis completed - Job: {job_id}, Malicious: {analysis_result.is_malicious}, "
-            f"Threats: {len(analysis_result.detected_threats)}"
+            "Analysis completed - Job: %s, Malicious: %s, Threats: %d",
+            job_id, analysis_result.is_malicious, len(analysis_result.detected_threats)
         )
         
-        return response
+        # Serialize once via orjson instead of FastAPI's jsonable_encoder pass
+        body = orjson.dumps(response.model_dump(mode="json"))
+        return Response(body, media_type="application/json")
         
     except ValueError as e:
-        logger.warning(f"Validation error for job {job_id}: {str(e)}")
+        logger.warning("Validation error for job %s: %s", job_id, e)
+        _store_failed_job(job_id, job_data, e)
         raise HTTPException(
             status_code=400,
             detail=f"Invalid input: {str(e)}"
         )
     
     except Exception as e:
-        logger.error(f"Analysis failed for job {job_id}: {str(e)}")
-        security_logger.error(f"Analysis error - Job: {job_id}, Error: {str(e)}")
+        logger.error("Analysis failed for job %s: %s", job_id, e)
+        security_logger.error("Analysis error - Job: %s, Error: %s", job_id, e)
         
         # Update job status
-        job_data = analysis_service.get_job(job_id)
-        if job_data:
-            job_data.update({
-                "status": "failed",
-                "completed_at": datetime.utcnow(),
-                "error": str(e)
-            })
-            analysis_service.store_job(job_id, job_data)
+        _store_failed_job(job_id, job_data, e)
         
         raise HTTPException(
             status_code=500,
             detail="Internal analysis error occurred"
         )
+    
+    finally:
+        # Also covers cancellation (client disconnect, shutdown), which
+        # bypasses the handlers above and would otherwise leak the entry
+        analysis_service.clear_in_flight(job_id)
 
 
 @api_router.get(
@@ -203,42 +245,112 @@ async def get_job_status(job_id: str) -> JobStatus:
         job_data = analysis_service.get_job(job_id)
         
         if not job_data:
-            logger.warning(f"Job status requested for unknown job: {job_id}")
+            created_at = analysis_service.get_in_flight(job_id)
+            if created_at is not None:
+                # Still being analyzed - nothing has been stored yet
+                return JobStatus(
+                    job_id=job_id,
+                    status="processing",
+                    created_at=created_at,
+                    progress=0.5
+                )
+            
+            logger.warning("Job status requested for unknown job: %s", job_id)
             raise HTTPException(
                 status_code=404,
                 detail=f"Job {job_id} not found"
             )
         
-        # Calculate progress based on status
-        progress_map = {
-            "pending": 0.0,
-            "processing": 0.5,
-            "completed": 1.0,
-            "failed": 1.0
-        }
-        
+        status = job_data["status"]
         status_response = JobStatus(
             job_id=job_id,
-            status=job_data["status"],
+            status=status,
             created_at=job_data["created_at"],
             completed_at=job_data.get("completed_at"),
-            progress=progress_map.get(job_data["status"], 0.0)
+            progress=_PROGRESS.get(status, 0.0),
+            honeypot_session_id=job_data.get("result", {}).get("honeypot_session_id"),
+            honeypot_redirect=job_data.get("honeypot_redirect")
         )
         
-        logger.info(f"Status check - Job: {job_id}, Status: {job_data['status']}")
+        logger.info("Status check - Job: %s, Status: %s", job_id, status)
         
         return status_response
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Status check failed for job {job_id}: {str(e)}")
+        logger.error("Status check failed for job %s: %s", job_id, e)
         raise HTTPException(
             status_code=500,
             detail="Failed to retrieve job status"
         )
 
 
+_TIMESTAMP_PLACEHOLDER = "__SHIELD_TIMESTAMP__"
+
+
+def _split_on_timestamp(payload: dict) -> Tuple[bytes, bytes]:
+    """
+    Serialize a static payload once, split around its "timestamp" value.
+    
+    The returned head/tail pair lets handlers splice in a fresh timestamp
+    per request without re-validating or re-encoding the rest of the body.
+    """
+    payload = dict(payload, timestamp=_TIMESTAMP_PLACEHOLDER)
+    head, tail = orjson.dumps(payload).split(_TIMESTAMP_PLACEHOLDER.encode())
+    return head, tail
+
+
+def _stamped_response(head: bytes, tail: bytes) -> Response:
+    """Build a JSON response from a pre-serialized head/tail pair."""
+    timestamp = utc_isoformat().encode()
+    return Response(head + timestamp + tail, media_type="application/json")
+
+
+_HEALTH_BODY = _split_on_timestamp({
+    "status": "healthy",
+    "service": "SHIELD Analysis API",
+    "version": settings.VERSION,
+    "timestamp": None,
+    "features": {
+        "ai_models": "stub",  # Will be "active" in Phase 1
+        "honeypot": "stub" if settings.HONEYPOT_ENABLED else "disabled"  # Will be "active" in Phase 2
+    }
+})
+
+_TEST_BENIGN_BODY = _split_on_timestamp(AnalysisResponse(
+    job_id="test_benign_123",
+    status="completed",
+    result=AnalysisResult(
+        is_malicious=False,
+        threat_level="low",
+        confidence_score=0.95,
+        detected_threats=[],
+        analysis_metadata={"test": True}
+    )
+).model_dump(mode="json"))
+
+_TEST_MALICIOUS_BODY = _split_on_timestamp(AnalysisResponse(
+    job_id="test_malicious_123",
+    status="completed",
+    result=AnalysisResult(
+        is_malicious=True,
+        threat_level="high",
+        confidence_score=0.85,
+        detected_threats=[
+            ThreatDetection(
+                attack_type=AttackType.SQL_INJECTION,
+                confidence=0.85,
+                severity=ThreatLevel.HIGH,
+                description="Test SQL injection detection",
+                mitigation="Use parameterized queries"
+            )
+        ],
+        analysis_metadata={"test": True}
+    )
+).model_dump(mode="json"))
+
+
 @api_router.get(
     "/health",
     summary="API health check",
@@ -246,16 +358,7 @@ async def get_job_status(job_id: str) -> JobStatus:
 )
 async def health_check():
     """Health check endpoint for monitoring."""
-    return {
-        "status": "healthy",
-        "service": "SHIELD Analysis API",
-        "version": settings.VERSION,
-        "timestamp": datetime.utcnow().isoformat(),
-        "features": {
-            "ai_models": "stub",  # Will be "active" in Phase 1
-            "honeypot": "stub" if settings.HONEYPOT_ENABLED else "disabled"  # Will be "active" in Phase 2
-        }
-    }
+    return _stamped_response(*_HEALTH_BODY)
 
 
 # Example endpoints for testing (can be removed in production)
@@ -266,17 +369,7 @@ async def health_check():
 )
 async def test_benign():
     """Test endpoint for benign analysis results."""
-    return AnalysisResponse(
-        job_id="test_benign_123",
-        status="completed",
-        result=AnalysisResult(
-            is_malicious=False,
-            threat_level="low",
-            confidence_score=0.95,
-            detected_threats=[],
-            analysis_metadata={"test": True}
-        )
-    )
+    return _stamped_response(*_TEST_BENIGN_BODY)
 
 
 @api_router.post(
@@ -286,24 +379,4 @@ async def test_benign():
 )
 async def test_malicious():
     """Test endpoint for malicious analysis results."""
-    from app.models.schemas import ThreatDetection, AttackType, ThreatLevel
-    
-    return AnalysisResponse(
-        job_id="test_malicious_123",
-        status="completed",
-        result=AnalysisResult(
-            is_malicious=True,
-            threat_level="high",
-            confidence_score=0.85,
-            detected_threats=[
-                ThreatDetection(
-                    attack_type=AttackType.SQL_INJECTION,
-                    confidence=0.85,
-                    severity=ThreatLevel.HIGH,
-                    description="Test SQL injection detection",
-                    mitigation="Use parameterized queries"
-                )
-            ],
-            analysis_metadata={"test": True}
-        )
-    )
\ No newline at end of file
+    return _stamped_response(*_TEST_MALICIOUS_BODY)
@@ -0,0 +1,33 @@
+"""
+Clock helpers for SHIELD Backend
+
+Response timestamps are formatted on every request; the calendar part only
+changes once per second, so it is cached and only the fraction is rendered
+per call (same idea as HTTP servers caching their Date header).
+"""
+
+import time
+
+# (unix second, "YYYY-MM-DDTHH:MM:SS") for the most recently formatted second
+_cached_second = (-1, "")
+
+
+def utc_isoformat() -> str:
+    """
+    Return the current UTC time in the format of datetime.utcnow().isoformat():
+    with microseconds, which are omitted when they are exactly zero.
+    """
+    global _cached_second
+
+    now_ns = time.time_ns()
+    second, fraction_ns = divmod(now_ns, 1_000_000_000)
+
+    cached = _cached_second
+    if cached[0] != second:
+        cached = (second, time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second)))
+        _cached_second = cached
+
+    microsecond = fraction_ns // 1000
+    if not microsecond:
+        return cached[1]
+    return f"{cached[1]}.{microsecond:06d}"
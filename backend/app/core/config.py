@@ -3,14 +3,16 @@ Core configuration for SHIELD Backend Application
 Compatible with Python 3.8+
 """
 
-import os
 import sys
+from functools import lru_cache
 from typing import List
 
 # Handle different Python versions and pydantic versions
 try:
-    from pydantic_settings import BaseSettings
+    from pydantic_settings import BaseSettings, SettingsConfigDict
+    HAS_PYDANTIC_SETTINGS = True
 except ImportError:
+    HAS_PYDANTIC_SETTINGS = False
     try:
         from pydantic import BaseSettings
     except ImportError:
@@ -30,14 +32,15 @@ class Settings(BaseSettings):
     # Application
     APP_NAME: str = "SHIELD Security Analysis API"
     VERSION: str = "1.0.0"
-    DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
+    DEBUG: bool = False
     
     # Server
-    HOST: str = os.getenv("HOST", "127.0.0.1")
-    PORT: int = int(os.getenv("PORT", "8000"))
+    HOST: str = "127.0.0.1"
+    PORT: int = 8000
+    WORKERS: int = 1  # Server processes; 0 = one per CPU core. Jobs are stored per process.
     
     # Security
-    SECRET_KEY: str = os.getenv("SECRET_KEY", "shield-secret-key-change-in-production")
+    SECRET_KEY: str = "shield-secret-key-change-in-production"
     
     # CORS
     ALLOWED_ORIGINS: List[str] = [
@@ -52,20 +55,43 @@ class Settings(BaseSettings):
     
     # Future Integration Points
     # Phase 1: AI Model Configuration
-    AI_MODEL_PATH: str = os.getenv("AI_MODEL_PATH", "./models/")
-    AI_MODEL_TIMEOUT: int = int(os.getenv("AI_MODEL_TIMEOUT", "30"))
+    AI_MODEL_PATH: str = "./models/"
+    AI_MODEL_TIMEOUT: int = 30
+    SIMULATE_LATENCY: bool = False  # Sleep 0.1-0.5s per analysis to mimic model inference
+    ANALYSIS_WORKERS: int = 2  # Text analysis processes per server process; 0 = run on a thread
+    ANALYSIS_CACHE_SIZE: int = 10000  # Cached detection results per input; 0 disables (always off in DEBUG)
+    ANALYSIS_CACHE_TTL: int = 60  # seconds
+    JOB_STORE_SIZE: int = 10000  # Completed jobs kept for /status
+    JOB_TTL: int = 3600  # seconds
+    PREDICTION_CACHE_SIZE: int = 10000  # Cached SQL injection predictions; 0 disables
     
     # Phase 2: Honeypot Configuration
-    HONEYPOT_ENABLED: bool = os.getenv("HONEYPOT_ENABLED", "false").lower() == "true"
-    HONEYPOT_SESSION_TIMEOUT: int = int(os.getenv("HONEYPOT_SESSION_TIMEOUT", "1800"))  # 30 minutes
-    HONEYPOT_LOG_PATH: str = os.getenv("HONEYPOT_LOG_PATH", "./logs/honeypot/")
+    HONEYPOT_ENABLED: bool = False
+    HONEYPOT_SESSION_TIMEOUT: int = 1800  # 30 minutes
+    HONEYPOT_LOG_PATH: str = "./logs/honeypot/"
     
     # Logging
-    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
-    LOG_FILE: str = os.getenv("LOG_FILE", "shield.log")
+    LOG_LEVEL: str = "INFO"
+    LOG_FILE: str = "shield.log"
     
-    class Config:
-        env_file = ".env"
+    if HAS_PYDANTIC_SETTINGS:
+        model_config = SettingsConfigDict(env_file=".env", frozen=True)
+    else:
+        class Config:  # pydantic v1
+            env_file = ".env"
+            frozen = True
 
 
-settings = Settings()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Return the process-wide settings instance.
+    
+    Environment variables and the .env file are read once, on first call;
+    BaseSettings resolves each field from the environment by name, so the
+    defaults above are only used when a variable is unset.
+    """
+    return Settings()
+
+
+settings = get_settings()
\ No newline at end of file
@@ -3,10 +3,14 @@ Logging configuration for SHIELD Backend
 Compatible with Python 3.8+ and handles optional dependencies gracefully
 """
 
+import atexit
 import logging
 import logging.config
+import logging.handlers
 import os
+import queue
 from pathlib import Path
+from typing import List, Tuple
 
 # Try to import structlog, fall back to standard logging if not available
 try:
@@ -18,9 +22,24 @@ except ImportError:
 
 from app.core.config import settings
 
+# Background listeners started by setup_logging(), stopped by stop_logging(),
+# with the logger, its QueueHandler and the handlers the listener took over
+_queue_listeners: List[Tuple[
+    logging.handlers.QueueListener, logging.Logger, logging.Handler, List[logging.Handler]
+]] = []
+
+# Set while setup_logging() is in effect; dictConfig must not be applied twice
+# or every logger ends up with duplicate file handlers
+_logging_configured = False
+
 
 def setup_logging():
     """Setup logging configuration with fallback options."""
+    global _logging_configured
+    
+    if _logging_configured:
+        return
+    _logging_configured = True
     
     # Create logs directory if it doesn't exist
     log_dir = Path("logs")
@@ -84,6 +103,10 @@ def setup_logging():
     
     logging.config.dictConfig(LOGGING_CONFIG)
     
+    # Move handler I/O (file writes, rotation, console) off the request path
+    for logger_name in LOGGING_CONFIG["loggers"]:
+        _attach_queue_listener(logging.getLogger(logger_name))
+    
     # Configure structlog if available
     if HAS_STRUCTLOG:
         structlog.configure(
@@ -105,6 +128,48 @@ def setup_logging():
         )
 
 
+def _attach_queue_listener(target: logging.Logger):
+    """
+    Replace a logger's handlers with a QueueHandler.
+    
+    The original handlers are driven by a QueueListener thread, so callers
+    only pay for an in-memory enqueue. Each logger gets its own queue to keep
+    the per-logger handler routing from the dictConfig above.
+    """
+    handlers = list(target.handlers)
+    if not handlers:
+        return
+    
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    
+    for handler in handlers:
+        target.removeHandler(handler)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    target.addHandler(queue_handler)
+    
+    listener.start()
+    _queue_listeners.append((listener, target, queue_handler, handlers))
+
+
+def stop_logging():
+    """
+    Flush queued log records, stop the listener threads and put the
+    original handlers back, so setup_logging() can run again afterwards.
+    """
+    global _logging_configured
+    
+    while _queue_listeners:
+        listener, target, queue_handler, handlers = _queue_listeners.pop()
+        listener.stop()
+        target.removeHandler(queue_handler)
+        for handler in handlers:
+            target.addHandler(handler)
+    _logging_configured = False
+
+
+atexit.register(stop_logging)
+
 # Create loggers for different components
 logger = logging.getLogger(__name__)
 security_logger = logging.getLogger("shield.security")
\ No newline at end of file
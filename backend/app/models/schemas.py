@@ -9,21 +9,13 @@ and provide data validation and serialization.
 from datetime import datetime
 from enum import Enum
 from typing import List, Optional, Dict, Any, Union
-import base64
 import re
 import sys
+from urllib.parse import urlsplit
 
-# Handle Pydantic imports for different versions
+# Pydantic v2 is required (ConfigDict, model_validator)
 try:
-    from pydantic import BaseModel, Field
-    # Try Pydantic v2 validator
-    try:
-        from pydantic import field_validator as validator
-        PYDANTIC_V2 = True
-    except ImportError:
-        # Fall back to Pydantic v1 validator
-        from pydantic import validator
-        PYDANTIC_V2 = False
+    from pydantic import BaseModel, ConfigDict, Field, model_validator
 except ImportError:
     raise ImportError("Please install pydantic: pip install pydantic>=2.0.0")
 
@@ -37,6 +29,61 @@ else:
         from typing_extensions import Literal
 
 
+# URL validation helpers. URLs are split with urlsplit and each part is
+# checked with short anchored patterns, so validation stays linear in the
+# input length (no backtracking over the whole URL).
+_URL_SCHEMES = ('http', 'https')
+_WHITESPACE = re.compile(r'\s')
+_HOST_LABEL = re.compile(r'[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?')
+_TOP_LEVEL_LABEL = re.compile(r'[A-Za-z]{2,6}')
+_IPV4_HOST = re.compile(r'[0-9]{1,3}(?:\.[0-9]{1,3}){3}')
+_PORT = re.compile(r'[0-9]+')
+_MAX_HOSTNAME_LENGTH = 253
+
+# Standard base64 alphabet with up to two padding characters; ASCII
+# whitespace (line-wrapped payloads) is ignored, as b64decode() does
+_BASE64_PATTERN = re.compile(r'[A-Za-z0-9+/]+={0,2}')
+_BASE64_WHITESPACE = re.compile(r'[\t\n\v\f\r ]+')
+
+
+def _is_valid_hostname(host: str) -> bool:
+    """Check a URL host: a dotted domain name, localhost, or an IPv4 address."""
+    if host.lower() == 'localhost' or _IPV4_HOST.fullmatch(host):
+        return True
+    if len(host) > _MAX_HOSTNAME_LENGTH:
+        return False
+    if host.endswith('.'):
+        host = host[:-1]
+    labels = host.split('.')
+    if len(labels) < 2 or not _TOP_LEVEL_LABEL.fullmatch(labels[-1]):
+        return False
+    return all(_HOST_LABEL.fullmatch(label) for label in labels[:-1])
+
+
+def _is_valid_url(url: str) -> bool:
+    """Basic http(s) URL validation: scheme, host, optional port, then a path or query."""
+    # urlsplit silently drops tabs/newlines, so reject whitespace up front
+    if _WHITESPACE.search(url):
+        return False
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return False
+    if parts.scheme not in _URL_SCHEMES or url[len(parts.scheme):len(parts.scheme) + 3] != '://':
+        return False
+
+    host, has_port, port = parts.netloc.partition(':')
+    if has_port and not _PORT.fullmatch(port):
+        return False
+    if not _is_valid_hostname(host):
+        return False
+
+    # Whatever follows the host is nothing, a lone '/', or a path or query
+    # with at least one more character (no fragment-only tail or bare '?')
+    rest = url[len(parts.scheme) + 3 + len(parts.netloc):]
+    return rest in ('', '/') or (len(rest) > 1 and rest[0] in '/?')
+
+
 class InputType(str, Enum):
     """Enumeration for supported input types."""
     TEXT = "text"
@@ -75,6 +122,41 @@ class AttackType(str, Enum):
     UNKNOWN = "unknown"
 
 
+def _validate_text(content: str) -> None:
+    if not content or content.isspace():
+        raise ValueError("Text content cannot be empty")
+    if len(content) > 10000:  # 10KB limit for text
+        raise ValueError("Text content too large (max 10KB)")
+
+
+def _validate_url(content: str) -> None:
+    if not _is_valid_url(content):
+        raise ValueError("Invalid URL format")
+
+
+def _validate_image(content: str) -> None:
+    # Size limit check first - cheapest rejection
+    if len(content) > 7000000:  # Roughly 5MB when base64 decoded
+        raise ValueError("Image too large (max 5MB)")
+    
+    # Validate base64 encoding without decoding the payload; the
+    # bytes are only decoded where the analysis needs them. Unlike
+    # b64decode(), characters outside the alphabet are rejected rather
+    # than skipped, and so is an empty payload.
+    if _BASE64_WHITESPACE.search(content):
+        content = _BASE64_WHITESPACE.sub('', content)
+    if len(content) % 4 or not _BASE64_PATTERN.fullmatch(content):
+        raise ValueError("Invalid base64 encoded image")
+
+
+# Content validation per input type
+_CONTENT_VALIDATORS = {
+    InputType.TEXT: _validate_text,
+    InputType.URL: _validate_url,
+    InputType.IMAGE: _validate_image,
+}
+
+
 class AnalysisRequest(BaseModel):
     """Request model for security analysis."""
     
@@ -86,79 +168,28 @@ class AnalysisRequest(BaseModel):
     ip_address: Optional[str] = Field(None, description="Source IP address")
     session_id: Optional[str] = Field(None, description="Session identifier")
     
-    # Use different validator syntax based on Pydantic version
-    if PYDANTIC_V2:
-        @validator('content')
-        @classmethod
-        def validate_content(cls, v, info=None):
-            """Validate content based on input type."""
-            # Get values from info context for Pydantic v2
-            if info and hasattr(info, 'data'):
-                input_type = info.data.get('input_type')
-            else:
-                # Fallback - validation will be less strict
-                return v
-            
-            return cls._validate_content_logic(v, input_type)
-    else:
-        @validator('content')
-        def validate_content(cls, v, values):
-            """Validate content based on input type."""
-            input_type = values.get('input_type')
-            return cls._validate_content_logic(v, input_type)
+    @model_validator(mode='after')
+    def validate_content(self):
+        """Validate content based on input type."""
+        _CONTENT_VALIDATORS[self.input_type](self.content)
+        return self
     
-    @classmethod
-    def _validate_content_logic(cls, v, input_type):
-        """Common validation logic for content field."""
-        if not input_type:
-            return v
-            
-        if input_type == InputType.TEXT:
-            if len(v.strip()) == 0:
-                raise ValueError("Text content cannot be empty")
-            if len(v) > 10000:  # 10KB limit for text
-                raise ValueError("Text content too large (max 10KB)")
-        
-        elif input_type == InputType.URL:
-            # Basic URL validation
-            url_pattern = re.compile(
-                r'^https?://'  # http:// or https://
-                r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain...
-                r'localhost|'  # localhost...
-                r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
-                r'(?::\d+)?'  # optional port
-                r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-            
-            if not url_pattern.match(v):
-                raise ValueError("Invalid URL format")
-        
-        elif input_type == InputType.IMAGE:
-            # Validate base64 encoded image
-            try:
-                base64.b64decode(v)
-            except Exception:
-                raise ValueError("Invalid base64 encoded image")
-            
-            # Size limit check (5MB encoded)
-            if len(v) > 7000000:  # Roughly 5MB when base64 decoded
-                raise ValueError("Image too large (max 5MB)")
-        
-        return v
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "input_type": "text",
-                "content": "SELECT * FROM users WHERE id = 1",
-                "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                "ip_address": "192.168.1.100"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "input_type": "text",
+            "content": "SELECT * FROM users WHERE id = 1",
+            "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+            "ip_address": "192.168.1.100"
         }
+    })
 
 
 class ThreatDetection(BaseModel):
     """Model for individual threat detection."""
     
+    # Immutable, so fixed detections can be built once and shared
+    model_config = ConfigDict(frozen=True)
+    
     attack_type: AttackType
     confidence: float = Field(..., ge=0.0, le=1.0, description="Confidence score (0-1)")
     severity: ThreatLevel
@@ -205,32 +236,35 @@ class AnalysisResponse(BaseModel):
     
     # Honeypot redirection (Phase 2)
     honeypot_redirect: Optional[HoneypotRedirect] = None
+    honeypot_pending: bool = Field(
+        default=False,
+        description="Honeypot engagement is running in the background; poll the job status for its session and redirect"
+    )
     
     # Error information
     error: Optional[str] = None
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "job_id": "analysis_1698765432_abc123",
-                "status": "completed",
-                "timestamp": "2025-10-30T10:30:00Z",
-                "result": {
-                    "is_malicious": True,
-                    "threat_level": "high",
-                    "confidence_score": 0.95,
-                    "detected_threats": [
-                        {
-                            "attack_type": "sql_injection",
-                            "confidence": 0.95,
-                            "severity": "high",
-                            "description": "SQL injection attempt detected in user input",
-                            "mitigation": "Use parameterized queries and input validation"
-                        }
-                    ]
-                }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "job_id": "analysis_1698765432_abc123",
+            "status": "completed",
+            "timestamp": "2025-10-30T10:30:00Z",
+            "result": {
+                "is_malicious": True,
+                "threat_level": "high",
+                "confidence_score": 0.95,
+                "detected_threats": [
+                    {
+                        "attack_type": "sql_injection",
+                        "confidence": 0.95,
+                        "severity": "high",
+                        "description": "SQL injection attempt detected in user input",
+                        "mitigation": "Use parameterized queries and input validation"
+                    }
+                ]
             }
         }
+    })
 
 
 class JobStatus(BaseModel):
@@ -241,16 +275,17 @@ class JobStatus(BaseModel):
     created_at: datetime
     completed_at: Optional[datetime] = None
     progress: Optional[float] = Field(None, ge=0.0, le=1.0)
+    honeypot_session_id: Optional[str] = None
+    honeypot_redirect: Optional[HoneypotRedirect] = None  # Set once honeypot engagement completes
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "job_id": "analysis_1698765432_abc123",
-                "status": "processing",
-                "created_at": "2025-10-30T10:30:00Z",
-                "progress": 0.75
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "job_id": "analysis_1698765432_abc123",
+            "status": "processing",
+            "created_at": "2025-10-30T10:30:00Z",
+            "progress": 0.75
         }
+    })
 
 
 class ErrorResponse(BaseModel):
@@ -260,11 +295,10 @@ class ErrorResponse(BaseModel):
     detail: Optional[str] = None
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "error": "Invalid input format",
-                "detail": "URL format is not valid",
-                "timestamp": "2025-10-30T10:30:00Z"
-            }
-        }
\ No newline at end of file
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "error": "Invalid input format",
+            "detail": "URL format is not valid",
+            "timestamp": "2025-10-30T10:30:00Z"
+        }
+    })
\ No newline at end of file
@@ -6,29 +6,126 @@ for Phase 1 (AI Models) and Phase 2 (Honeypot System).
 """
 
 import asyncio
+import hashlib
 import logging
-import uuid
+import multiprocessing
+import re
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import random
 
+# Optional SIMD base64 decoder (falls back to the standard library)
+try:
+    import pybase64 as base64
+    HAS_PYBASE64 = True
+except ImportError:
+    import base64
+    HAS_PYBASE64 = False
+
 from app.models.schemas import (
     AnalysisRequest, AnalysisResult, ThreatDetection, HoneypotRedirect,
     InputType, AttackType, ThreatLevel
 )
+from app.core.cache import TTLCache
+from app.core.clock import utc_isoformat
 from app.core.config import settings
-from app.services.sql_injection_detector import sql_injection_detector
+from app.services.text_analysis import analyze_text
 
 
 logger = logging.getLogger(__name__)
 security_logger = logging.getLogger("shield.security")
 
 
+def _keyword_pattern(keywords: List[str]) -> "re.Pattern":
+    """
+    Compile keywords into one case-insensitive alternation, so content is
+    scanned once and never copied with .lower(). Case folding is ASCII-only,
+    matching what lower() does for these ASCII keywords.
+    """
+    pattern = "|".join(re.escape(keyword) for keyword in keywords)
+    return re.compile(pattern, re.IGNORECASE | re.ASCII)
+
+
+# Keyword groups used by the analysis stubs
+_SHORTENER_PATTERN = _keyword_pattern(['bit.ly', 'tinyurl.com', 'shortened.link'])  # Suspicious URL patterns
+_PHISHING_PATTERN = _keyword_pattern(['login', 'verify', 'suspend', 'update', 'secure'])
+_INTERNAL_HOST_PATTERN = _keyword_pattern(['localhost', '127.0.0.1', '192.168.'])
+
+# Fixed stub detections. ThreatDetection is frozen, so each one is built
+# once and shared by every result (confidences are the midpoints of the
+# ranges the stubs used to draw from).
+_SHORTENER_THREAT = ThreatDetection(
+    attack_type=AttackType.PHISHING,
+    confidence=0.55,
+    severity=ThreatLevel.MEDIUM,
+    description="Shortened URL detected - potential phishing risk",
+    mitigation="Verify the destination URL before clicking"
+)
+
+_PHISHING_THREAT = ThreatDetection(
+    attack_type=AttackType.PHISHING,
+    confidence=0.725,
+    severity=ThreatLevel.HIGH,
+    description="URL contains suspicious phishing keywords",
+    mitigation="Verify legitimacy through official channels"
+)
+
+_SSRF_THREAT = ThreatDetection(
+    attack_type=AttackType.SSRF,
+    confidence=0.8,
+    severity=ThreatLevel.CRITICAL,
+    description="Potential SSRF attack targeting internal resources",
+    mitigation="Validate and whitelist allowed external URLs"
+)
+
+_STEGANOGRAPHY_THREAT = ThreatDetection(
+    attack_type=AttackType.STEGANOGRAPHY,
+    confidence=0.45,
+    severity=ThreatLevel.MEDIUM,
+    description="Large image file - potential steganography risk",
+    mitigation="Scan image for hidden data and malicious payloads"
+)
+
+_METADATA_THREAT = ThreatDetection(
+    attack_type=AttackType.SUSPICIOUS_METADATA,
+    confidence=0.65,
+    severity=ThreatLevel.LOW,
+    description="Suspicious metadata patterns detected in image",
+    mitigation="Strip metadata before processing or storing image"
+)
+
+# Encoded image length above which the steganography check fires (~1MB)
+_IMAGE_LARGE_LENGTH = 1_000_000
+
+# Threat levels in ascending severity, and each level's position
+_RANK_INV = [ThreatLevel.LOW, ThreatLevel.MEDIUM, ThreatLevel.HIGH, ThreatLevel.CRITICAL]
+_RANK = {level: rank for rank, level in enumerate(_RANK_INV)}
+
+# Detections for recently seen inputs, so replayed payloads skip detection.
+# Only the detections are cached; job IDs, metadata, logging and honeypot
+# engagement are produced fresh for every request.
+_DETECTION_CACHE_ENABLED = settings.ANALYSIS_CACHE_SIZE > 0 and not settings.DEBUG
+
+
+def _detection_cache_key(input_type: InputType, content: str) -> Tuple[str, bytes]:
+    """Key an input by its type and a digest of its content."""
+    digest = hashlib.blake2b(content.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    return input_type, digest
+
+
 class AnalysisService:
     """Main service for coordinating security analysis."""
     
     def __init__(self):
-        self.job_store: Dict[str, Dict] = {}  # In-memory job storage (use Redis in production)
+        # In-memory job storage, bounded and expiring (use Redis in production)
+        self.job_store = TTLCache(maxsize=settings.JOB_STORE_SIZE, ttl=settings.JOB_TTL)
+        self.in_flight: Dict[str, datetime] = {}  # Job ID -> creation time for jobs not yet stored
+        self.worker_pool: Optional[ProcessPoolExecutor] = None  # Runs CPU-bound text detection
+        # Detection results by input; the TTL bounds how long a stale classification is served
+        self.detection_cache = TTLCache(settings.ANALYSIS_CACHE_SIZE, settings.ANALYSIS_CACHE_TTL)
     
     async def analyze_input(self, request: AnalysisRequest) -> AnalysisResult:
         """
@@ -40,29 +137,23 @@ class AnalysisService:
         Returns:
             AnalysisResult containing the analysis findings
         """
-        start_time = datetime.utcnow()
-        
-        # Log security analysis request
-        security_logger.info(
-            f"Analysis request received - Type: {request.input_type}, "
-            f"IP: {request.ip_address}, Session: {request.session_id}"
-        )
+        start_ns = time.perf_counter_ns()
+        analysis_timestamp = utc_isoformat()
+        content_len = len(request.content)
         
         try:
             # Phase 1 Integration Point: AI Model Analysis
-            is_malicious, detected_threats = await self.ai_analysis_stub(
+            is_malicious, detected_threats = await self._detect(
                 request.input_type, 
-                request.content
+                request.content,
+                content_len
             )
             
             # Calculate processing time
-            processing_time = (datetime.utcnow() - start_time).total_seconds() * 1000
+            processing_time = (time.perf_counter_ns() - start_ns) / 1_000_000
             
-            # Determine overall threat level
-            threat_level = self._calculate_threat_level(detected_threats)
-            
-            # Calculate confidence score
-            confidence_score = self._calculate_confidence_score(detected_threats)
+            # Determine overall threat level and confidence score
+            threat_level, confidence_score = self._aggregate(detected_threats)
             
             # Create analysis result
             result = AnalysisResult(
@@ -72,8 +163,8 @@ class AnalysisService:
                 detected_threats=detected_threats,
                 analysis_metadata={
                     "input_type": request.input_type,
-                    "content_length": len(request.content),
-                    "analysis_timestamp": start_time.isoformat(),
+                    "content_length": content_len,
+                    "analysis_timestamp": analysis_timestamp,
                     "user_agent": request.user_agent,
                     "ip_address": request.ip_address
                 },
@@ -82,20 +173,51 @@ class AnalysisService:
                 honeypot_triggered=False  # Will be set if honeypot is triggered
             )
             
-            # Log analysis result
+            # One security record per analysis; the fields are also attached
+            # as record attributes for structured (JSON) handlers
             security_logger.info(
-                f"Analysis completed - Malicious: {is_malicious}, "
-                f"Threats: {len(detected_threats)}, Time: {processing_time:.2f}ms"
+                "Analysis completed - Type: %s, IP: %s, Session: %s, "
+                "Malicious: %s, Threats: %d, Time: %.2fms",
+                request.input_type.value, request.ip_address, request.session_id,
+                is_malicious, len(detected_threats), processing_time,
+                extra={
+                    "input_type": request.input_type.value,
+                    "ip": request.ip_address,
+                    "session": request.session_id,
+                    "malicious": is_malicious,
+                    "threats": len(detected_threats),
+                    "ms": processing_time,
+                }
             )
             
             return result
             
         except Exception as e:
-            logger.error(f"Analysis failed: {str(e)}")
-            security_logger.error(f"Analysis error - IP: {request.ip_address}, Error: {str(e)}")
+            logger.error("Analysis failed: %s", e)
+            security_logger.error("Analysis error - IP: %s, Error: %s", request.ip_address, e)
             raise
     
-    async def ai_analysis_stub(self, input_type: InputType, content: str) -> tuple[bool, List[ThreatDetection]]:
+    async def _detect(
+        self, input_type: InputType, content: str, content_len: int
+    ) -> Tuple[bool, List[ThreatDetection]]:
+        """Run threat detection, reusing a cached result for a replayed input."""
+        if not _DETECTION_CACHE_ENABLED:
+            return await self.ai_analysis_stub(input_type, content, content_len)
+        
+        cache_key = _detection_cache_key(input_type, content)
+        cached = self.detection_cache.get(cache_key)
+        if cached is not None:
+            is_malicious, threats = cached
+            return is_malicious, list(threats)
+        
+        is_malicious, detected_threats = await self.ai_analysis_stub(input_type, content, content_len)
+        # ThreatDetection is frozen, so the detections can be shared
+        self.detection_cache.set(cache_key, (is_malicious, tuple(detected_threats)))
+        return is_malicious, detected_threats
+    
+    async def ai_analysis_stub(
+        self, input_type: InputType, content: str, content_len: Optional[int] = None
+    ) -> tuple[bool, List[ThreatDetection]]:
         """
         PHASE 1 INTEGRATION POINT: AI Model Analysis Stub
         
@@ -105,18 +227,26 @@ class AnalysisService:
         Args:
             input_type: The type of input being analyzed
             content: The actual content to analyze
+            content_len: len(content), if the caller already has it
             
         Returns:
             Tuple of (is_malicious: bool, detected_threats: List[ThreatDetection])
         """
-        # Simulate AI model processing time
-        await asyncio.sleep(random.uniform(0.1, 0.5))
+        # Simulate AI model processing time (demo/dev only)
+        if settings.SIMULATE_LATENCY:
+            await asyncio.sleep(random.uniform(0.1, 0.5))
         
         detected_threats = []
         
         # Simulate threat detection based on input type and content patterns
         if input_type == InputType.TEXT:
-            threats = self._analyze_text_stub(content)
+            # The SQL injection detector is CPU-bound; keep it off the event
+            # loop - in the process pool when running, else a worker thread
+            loop = asyncio.get_running_loop()
+            if self.worker_pool is not None:
+                threats = await loop.run_in_executor(self.worker_pool, analyze_text, content)
+            else:
+                threats = await loop.run_in_executor(None, analyze_text, content)
             detected_threats.extend(threats)
             
         elif input_type == InputType.URL:
@@ -124,162 +254,87 @@ class AnalysisService:
             detected_threats.extend(threats)
             
         elif input_type == InputType.IMAGE:
-            threats = self._analyze_image_stub(content)
+            if content_len is None:
+                content_len = len(content)
+            threats = self._analyze_image_stub(content, content_len)
             detected_threats.extend(threats)
         
         is_malicious = len(detected_threats) > 0
         
-        logger.info(f"AI Analysis Stub - Input: {input_type}, Malicious: {is_malicious}, Threats: {len(detected_threats)}")
+        logger.info(
+            "AI Analysis Stub - Input: %s, Malicious: %s, Threats: %d",
+            input_type, is_malicious, len(detected_threats)
+        )
         
         return is_malicious, detected_threats
     
     def _analyze_text_stub(self, content: str) -> List[ThreatDetection]:
-        """
-        Text-based threat analysis using the SQL injection detector.
-        Integrates the SimpleSQLInjectionDetector from model directory.
-        """
-        threats = []
-        
-        # Use the SQL injection detector for analysis
-        detection_result = sql_injection_detector.predict(content)
-        
-        if detection_result['is_malicious']:
-            # Map risk score to severity
-            risk_score = detection_result['risk_score']
-            if risk_score >= 50:
-                severity = ThreatLevel.CRITICAL
-            elif risk_score >= 30:
-                severity = ThreatLevel.HIGH
-            elif risk_score >= 15:
-                severity = ThreatLevel.MEDIUM
-            else:
-                severity = ThreatLevel.LOW
-            
-            # Create detailed description from indicators
-            indicators_text = "; ".join(detection_result['indicators'][:3])  # Top 3 indicators
-            description = f"SQL injection detected: {indicators_text}"
-            
-            threats.append(ThreatDetection(
-                attack_type=AttackType.SQL_INJECTION,
-                confidence=detection_result['confidence'],
-                severity=severity,
-                description=description,
-                mitigation="Use parameterized queries and input validation. Avoid dynamic SQL construction with user input."
-            ))
-            
-            logger.info(
-                f"SQL injection detected - Risk Score: {risk_score}, "
-                f"Confidence: {detection_result['confidence']:.2f}, "
-                f"Indicators: {len(detection_result['indicators'])}"
-            )
-        else:
-            logger.info(f"Text analysis: No malicious patterns detected")
-        
-        # Additional XSS detection (keeping existing functionality)
-        content_lower = content.lower()
-        if any(keyword in content_lower for keyword in ['<script', 'javascript:', 'onerror', 'onload']):
-            threats.append(ThreatDetection(
-                attack_type=AttackType.XSS,
-                confidence=random.uniform(0.6, 0.9),
-                severity=ThreatLevel.MEDIUM,
-                description="Potential XSS attack pattern detected",
-                mitigation="Sanitize and encode user input before rendering"
-            ))
-        
-        return threats
+        """Text-based threat analysis (see text_analysis.analyze_text)."""
+        return analyze_text(content)
     
     def _analyze_url_stub(self, content: str) -> List[ThreatDetection]:
         """Stub for URL-based threat analysis."""
         threats = []
-        content_lower = content.lower()
-        
-        # Suspicious URL patterns
-        suspicious_domains = ['bit.ly', 'tinyurl.com', 'shortened.link']
-        phishing_keywords = ['login', 'verify', 'suspend', 'update', 'secure']
         
-        if any(domain in content_lower for domain in suspicious_domains):
-            threats.append(ThreatDetection(
-                attack_type=AttackType.PHISHING,
-                confidence=random.uniform(0.4, 0.7),
-                severity=ThreatLevel.MEDIUM,
-                description="Shortened URL detected - potential phishing risk",
-                mitigation="Verify the destination URL before clicking"
-            ))
+        if _SHORTENER_PATTERN.search(content):
+            threats.append(_SHORTENER_THREAT)
         
-        if any(keyword in content_lower for keyword in phishing_keywords):
-            threats.append(ThreatDetection(
-                attack_type=AttackType.PHISHING,
-                confidence=random.uniform(0.6, 0.85),
-                severity=ThreatLevel.HIGH,
-                description="URL contains suspicious phishing keywords",
-                mitigation="Verify legitimacy through official channels"
-            ))
+        if _PHISHING_PATTERN.search(content):
+            threats.append(_PHISHING_THREAT)
         
-        if 'localhost' in content_lower or '127.0.0.1' in content or '192.168.' in content:
-            threats.append(ThreatDetection(
-                attack_type=AttackType.SSRF,
-                confidence=random.uniform(0.7, 0.9),
-                severity=ThreatLevel.CRITICAL,
-                description="Potential SSRF attack targeting internal resources",
-                mitigation="Validate and whitelist allowed external URLs"
-            ))
+        if _INTERNAL_HOST_PATTERN.search(content):
+            threats.append(_SSRF_THREAT)
         
         return threats
     
-    def _analyze_image_stub(self, content: str) -> List[ThreatDetection]:
+    @staticmethod
+    def decode_image(content: str) -> bytes:
+        """
+        Decode a base64 image payload for analysis.
+        
+        The request validator only checks the encoding, so image models
+        should call this once and pass the bytes along rather than
+        decoding again. Uses pybase64 when it is installed.
+        """
+        # Strict decoding rejects the line breaks the validator allows
+        return base64.b64decode("".join(content.split()), validate=True)
+    
+    def _analyze_image_stub(self, content: str, content_len: int) -> List[ThreatDetection]:
         """Stub for image-based threat analysis."""
         threats = []
         
         # Simulate image analysis based on content length and patterns
-        content_size = len(content)
-        
         # Large images might contain hidden data
-        if content_size > 1000000:  # > 1MB
-            threats.append(ThreatDetection(
-                attack_type=AttackType.STEGANOGRAPHY,
-                confidence=random.uniform(0.3, 0.6),
-                severity=ThreatLevel.MEDIUM,
-                description="Large image file - potential steganography risk",
-                mitigation="Scan image for hidden data and malicious payloads"
-            ))
+        if content_len > _IMAGE_LARGE_LENGTH:
+            threats.append(_STEGANOGRAPHY_THREAT)
         
-        # Random suspicious metadata detection (for demo)
-        if random.random() < 0.2:  # 20% chance
-            threats.append(ThreatDetection(
-                attack_type=AttackType.SUSPICIOUS_METADATA,
-                confidence=random.uniform(0.5, 0.8),
-                severity=ThreatLevel.LOW,
-                description="Suspicious metadata patterns detected in image",
-                mitigation="Strip metadata before processing or storing image"
-            ))
+        # Simulated suspicious metadata detection: flags a stable ~20% of
+        # images, decided by the encoded length so repeated submissions agree
+        # and the payload is never rescanned
+        if content_len % 5 == 0:
+            threats.append(_METADATA_THREAT)
         
         return threats
     
-    def _calculate_threat_level(self, threats: List[ThreatDetection]) -> ThreatLevel:
-        """Calculate overall threat level based on detected threats."""
-        if not threats:
-            return ThreatLevel.LOW
-        
-        # Get the highest severity level
-        severity_levels = [threat.severity for threat in threats]
+    def _aggregate(self, threats: List[ThreatDetection]) -> Tuple[ThreatLevel, float]:
+        """
+        Calculate the overall threat level and confidence score in one pass.
         
-        if ThreatLevel.CRITICAL in severity_levels:
-            return ThreatLevel.CRITICAL
-        elif ThreatLevel.HIGH in severity_levels:
-            return ThreatLevel.HIGH
-        elif ThreatLevel.MEDIUM in severity_levels:
-            return ThreatLevel.MEDIUM
-        else:
-            return ThreatLevel.LOW
-    
-    def _calculate_confidence_score(self, threats: List[ThreatDetection]) -> float:
-        """Calculate overall confidence score."""
+        The threat level is the highest detected severity; the confidence is
+        the average confidence of the detected threats.
+        """
         if not threats:
-            return 1.0  # High confidence that it's benign
+            return ThreatLevel.LOW, 1.0  # High confidence that it's benign
         
-        # Average confidence of detected threats
-        total_confidence = sum(threat.confidence for threat in threats)
-        return min(total_confidence / len(threats), 1.0)
+        max_rank = 0
+        total_confidence = 0.0
+        for threat in threats:
+            rank = _RANK[threat.severity]
+            if rank > max_rank:
+                max_rank = rank
+            total_confidence += threat.confidence
+        
+        return _RANK_INV[max_rank], min(total_confidence / len(threats), 1.0)
     
     async def honeypot_engagement_stub(self, attacker_input: str, session_id: str) -> HoneypotRedirect:
         """
@@ -296,18 +351,18 @@ class AnalysisService:
             HoneypotRedirect containing redirection information
         """
         # Generate honeypot session
-        honeypot_session_id = f"honeypot_{uuid.uuid4().hex[:8]}"
+        honeypot_session_id = "honeypot_" + secrets.token_hex(4)
         
         # Create fake terminal redirect URL
-        redirect_url = f"/honeypot/terminal/{honeypot_session_id}"
+        redirect_url = "/honeypot/terminal/" + honeypot_session_id
         
         # Set session expiration
         expires_at = datetime.utcnow() + timedelta(seconds=settings.HONEYPOT_SESSION_TIMEOUT)
         
         # Log honeypot engagement
         security_logger.warning(
-            f"Honeypot engaged - Session: {honeypot_session_id}, "
-            f"Original Input: {attacker_input[:100]}..."
+            "Honeypot engaged - Session: %s, Original Input: %s...",
+            honeypot_session_id, attacker_input[:100]
         )
         
         return HoneypotRedirect(
@@ -317,9 +372,47 @@ class AnalysisService:
             initial_command=attacker_input[:50] if len(attacker_input) > 50 else attacker_input
         )
     
+    def start_worker_pool(self, max_workers: int):
+        """
+        Start the process pool used for text analysis (app startup).
+        
+        Args:
+            max_workers: Number of worker processes per server process;
+                0 keeps text analysis on a thread in the server process
+        """
+        if self.worker_pool is not None or max_workers <= 0:
+            return
+        # Spawned workers start with a clean logging setup; forked ones would
+        # inherit queue handlers whose listener threads only exist in the parent.
+        # Their entry point lives in text_analysis, which sets nothing up on import.
+        self.worker_pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    
+    def stop_worker_pool(self):
+        """Shut down the text analysis process pool (app shutdown)."""
+        if self.worker_pool is None:
+            return
+        self.worker_pool.shutdown(wait=True)
+        self.worker_pool = None
+    
+    def mark_in_flight(self, job_id: str, created_at: datetime):
+        """Register a job that is being analyzed but has not been stored yet."""
+        self.in_flight[job_id] = created_at
+    
+    def get_in_flight(self, job_id: str) -> Optional[datetime]:
+        """Return the creation time of an in-flight job, if any."""
+        return self.in_flight.get(job_id)
+    
+    def clear_in_flight(self, job_id: str):
+        """Forget an in-flight job, whether or not it was stored."""
+        self.in_flight.pop(job_id, None)
+    
     def store_job(self, job_id: str, job_data: Dict[str, Any]):
         """Store job information for status tracking."""
-        self.job_store[job_id] = job_data
+        self.job_store.set(job_id, job_data)
+        self.in_flight.pop(job_id, None)
     
     def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve job information."""
@@ -327,4 +420,4 @@ class AnalysisService:
 
 
 # Global service instance
-analysis_service = AnalysisService()
\ No newline at end of file
+analysis_service = AnalysisService()
@@ -7,16 +7,141 @@ It integrates the trained hackathon ML model for enhanced accuracy.
 """
 
 import re
+import hashlib
+import operator
 import logging
 import pickle
 import os
+import threading
 import numpy as np
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from collections import Counter
 
+# Optional: joblib memory-maps the model's arrays instead of copying them
+try:
+    import joblib
+    HAS_JOBLIB = True
+except ImportError:
+    HAS_JOBLIB = False
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
 logger = logging.getLogger(__name__)
 
 
+# Feature extraction tables (copied from the hackathon model for consistency).
+# Dict order defines the feature layout, so entries must not be reordered.
+
+# SQL keywords with intelligent risk weighting
+SQL_KEYWORDS = {
+    # Highest risk (weight = 5) - Immediate red flags
+    'drop': 5, 'exec': 5, 'execute': 5, 'information_schema': 5,
+    'load_file': 5, 'into outfile': 5, 'cmdshell': 5, 'xp_cmdshell': 5,
+    
+    # High risk (weight = 4) - Strong attack indicators
+    'union': 4, 'delete': 4, 'sysobjects': 4, 'syscolumns': 4,
+    'waitfor': 4, 'benchmark': 4, 'pg_sleep': 4, 'sp_': 4,
+    
+    # Medium risk (weight = 3) - Moderate concern
+    'declare': 3, 'cast': 3, 'convert': 3, 'concat': 3,
+    'mysql': 3, 'version': 3, 'user': 3, 'database': 3,
+    
+    # Low-medium risk (weight = 2) - Basic SQL functions
+    'select': 2, 'insert': 2, 'update': 2, 'create': 2,
+    'alter': 2, 'substring': 2, 'ascii': 2, 'char': 2,
+    
+    # Low risk (weight = 1) - Common keywords
+    'where': 1, 'and': 1, 'from': 1, 'order': 1, 'group': 1,
+    'having': 1, 'join': 1, 'inner': 1, 'left': 1, 'right': 1
+}
+
+# Advanced attack patterns with severity weights
+ATTACK_PATTERNS = {
+    r'(?:\bor\b|\band\b)\s*\d+\s*=\s*\d+': 5,  # Classic 1=1 attacks
+    r'union\s+select': 5,                      # Union-based injection
+    r'drop\s+table': 5,                       # Table destruction
+    r'exec\s*\(': 4,                          # Code execution
+    r'%[0-9a-f]{2}': 2,                       # URL encoding
+    r'0x[0-9a-f]+': 3,                        # Hexadecimal encoding
+    r'--\s*$': 2,                             # SQL comments
+    r'/\*.*?\*/': 2,                          # Block comments
+    r'@@\w+': 3,                              # System variables
+    r'waitfor\s+delay': 4,                    # Time-based attacks
+    r'benchmark\s*\(': 4,                     # MySQL benchmark
+    r'pg_sleep\s*\(': 4,                      # PostgreSQL sleep
+    r'information_schema': 5,                 # Schema enumeration
+    r'char\s*\(\s*\d+': 3,                    # Character encoding
+    r'ascii\s*\(': 2,                         # ASCII function
+    r'substring\s*\(': 2,                     # Substring function
+    r'openrowset\s*\(': 5,                    # Remote data access
+    r'bulk\s+insert': 5,                      # Bulk operations
+    r'script\s*>': 3,                         # XSS patterns
+    r'<\s*script': 3,                         # XSS patterns
+    r'javascript\s*:': 3,                     # JavaScript injection
+    r'current_user': 2,                       # User functions
+    r'session_user': 2,                       # Session user
+    r'system_user': 2,                        # System user
+    r'host_name\s*\(': 2,                     # Host name
+    r'db_name\s*\(': 2,                       # Database name
+    r'@@version': 4,                          # Version information
+    r'@@servername': 3,                       # Server information
+    r'load_file\s*\(': 5,                     # File operations
+    r'into\s+outfile': 5,                     # File writing
+    r'load\s+data\s+infile': 5,               # File loading
+    r'grant\s+': 3,                           # Permission granting
+    r'revoke\s+': 3,                          # Permission revoking
+    r'shutdown': 5,                           # System shutdown
+    r'kill\s+\d+': 4,                         # Process termination
+}
+
+# Compiled once at import.
+# All keywords are matched in one left-to-right pass. Every keyword is a whole
+# word (or, for 'into outfile', a pair of words that are not keywords
+# themselves), so matches never overlap. Per-keyword counts are therefore the
+# same as running a separate \bkeyword\b search for each one.
+_SQL_KEYWORD_SCAN = re.compile(
+    r'\b(?:' + '|'.join(sorted(SQL_KEYWORDS, key=len, reverse=True)) + r')\b'
+)
+_SQL_KEYWORD_INDEX = {keyword: index for index, keyword in enumerate(SQL_KEYWORDS)}
+_SQL_KEYWORD_WEIGHTS = tuple(SQL_KEYWORDS.values())
+_ATTACK_PATTERNS = tuple(
+    (re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in ATTACK_PATTERNS.items()
+)
+# The patterns are all lower-case and run against lower-cased text, so for
+# ASCII input IGNORECASE changes nothing. It only matters for non-ASCII
+# case-insensitive matches such as 'ſ' for 's'. Dropping the flag there lets
+# the regex engine use its literal-prefix search, which is several times faster.
+_ATTACK_PATTERNS_ASCII = tuple(
+    (re.compile(pattern), weight) for pattern, weight in ATTACK_PATTERNS.items()
+)
+# Bound findall methods per pattern set, so the per-query pattern block is
+# one comprehension over prebuilt callables rather than a loop of lookups
+_ATTACK_PATTERN_SOURCES = tuple(ATTACK_PATTERNS)
+_ATTACK_PATTERN_WEIGHTS = tuple(ATTACK_PATTERNS.values())
+_ATTACK_FINDALL = tuple(pattern.findall for pattern, _ in _ATTACK_PATTERNS)
+_ATTACK_FINDALL_ASCII = tuple(pattern.findall for pattern, _ in _ATTACK_PATTERNS_ASCII)
+_URL_ENCODED_PATTERN = re.compile(r'%[0-9a-fA-F]{2}')
+_HEX_PATTERN = re.compile(r'0x[0-9a-fA-F]+')
+_BLOCK_COMMENT_PATTERN = re.compile(r'/\*.*?\*/', re.DOTALL)
+_FUNCTION_CALL_PATTERN = re.compile(r'\w+\s*\(')
+
+# Characters counted by the character-level features, in feature order
+_CHAR_FEATURE_CODES = np.array([ord(char) for char in "'\"()[]{};,=<>!?&|%*+-/\\_$@#^~"], dtype=np.intp)
+
+# Character classes over byte histogram bins, taken from the str methods so
+# they agree with them for ASCII text (bins >= 0x80 are left unset)
+_ASCII_CHARS = tuple(chr(code) for code in range(128))
+_ALPHA_MASK = np.array([char.isalpha() for char in _ASCII_CHARS] + [False] * 128)
+_DIGIT_MASK = np.array([char.isdigit() for char in _ASCII_CHARS] + [False] * 128)
+_SPACE_MASK = np.array([char.isspace() for char in _ASCII_CHARS] + [False] * 128)
+_SPECIAL_MASK = np.array([not char.isalnum() and not char.isspace() for char in _ASCII_CHARS] + [False] * 128)
+# Alpha, digit, space and special rows, so one matrix product gives all four counts
+_CHAR_CLASS_MASKS = np.array([_ALPHA_MASK, _DIGIT_MASK, _SPACE_MASK, _SPECIAL_MASK], dtype=np.int64)
+_UPPER_CASE_CODES = np.arange(ord('A'), ord('Z') + 1)
+_LOWER_CASE_CODES = np.arange(ord('a'), ord('z') + 1)
+
+
 class EnhancedSQLInjectionDetector:
     """Enhanced SQL injection detector using trained ML model."""
     
@@ -28,6 +153,9 @@ class EnhancedSQLInjectionDetector:
         self.ensemble_model = None
         self.fallback_detector = FallbackSQLDetector()
         
+        # predict() is pure in the query, so replayed payloads are answered from here
+        self.prediction_cache = TTLCache(maxsize=settings.PREDICTION_CACHE_SIZE, ttl=None)
+        
         # Try to load the trained model
         self._load_trained_model()
         
@@ -40,8 +168,13 @@ class EnhancedSQLInjectionDetector:
             model_path = os.path.abspath(model_path)
             
             if os.path.exists(model_path):
-                with open(model_path, 'rb') as f:
-                    model_data = pickle.load(f)
+                if HAS_JOBLIB:
+                    # Arrays saved by joblib.dump are mapped read-only and shared
+                    # through the page cache; plain pickles load as before
+                    model_data = joblib.load(model_path, mmap_mode='r')
+                else:
+                    with open(model_path, 'rb') as f:
+                        model_data = pickle.load(f)
                 
                 self.ensemble_model = model_data['ensemble']
                 self.model_accuracy = model_data.get('accuracy', 0.87)
@@ -56,170 +189,113 @@ class EnhancedSQLInjectionDetector:
             logger.error(f"❌ Failed to load trained model: {str(e)}")
             logger.info("📋 Using fallback pattern-based detection")
     
-    def enhanced_feature_extraction(self, texts):
+    def enhanced_feature_extraction(self, texts, return_counts: bool = False):
         """
         Extract 154 advanced features for SQL injection detection.
         (Copied from the hackathon model for consistency)
+        
+        Returns a contiguous float32 matrix of shape (len(texts), 154);
+        features beyond the computed ones are zero padding. With
+        return_counts=True, also returns one dict per text mapping each
+        attack pattern (and the function-call pattern) to its raw match
+        count, for FallbackSQLDetector.analyze_query to reuse.
         """
         if isinstance(texts, str):
             texts = [texts]
         
-        # SQL keywords with intelligent risk weighting
-        sql_keywords = {
-            # Highest risk (weight = 5) - Immediate red flags
-            'drop': 5, 'exec': 5, 'execute': 5, 'information_schema': 5,
-            'load_file': 5, 'into outfile': 5, 'cmdshell': 5, 'xp_cmdshell': 5,
-            
-            # High risk (weight = 4) - Strong attack indicators
-            'union': 4, 'delete': 4, 'sysobjects': 4, 'syscolumns': 4,
-            'waitfor': 4, 'benchmark': 4, 'pg_sleep': 4, 'sp_': 4,
-            
-            # Medium risk (weight = 3) - Moderate concern
-            'declare': 3, 'cast': 3, 'convert': 3, 'concat': 3,
-            'mysql': 3, 'version': 3, 'user': 3, 'database': 3,
-            
-            # Low-medium risk (weight = 2) - Basic SQL functions
-            'select': 2, 'insert': 2, 'update': 2, 'create': 2,
-            'alter': 2, 'substring': 2, 'ascii': 2, 'char': 2,
-            
-            # Low risk (weight = 1) - Common keywords
-            'where': 1, 'and': 1, 'from': 1, 'order': 1, 'group': 1,
-            'having': 1, 'join': 1, 'inner': 1, 'left': 1, 'right': 1
-        }
+        features = np.zeros((len(texts), 154), dtype=np.float32)
+        match_counts = []
         
-        # Advanced attack patterns with severity weights
-        attack_patterns = {
-            r'(\bor\b|\band\b)\s*\d+\s*=\s*\d+': 5,  # Classic 1=1 attacks
-            r'union\s+select': 5,                      # Union-based injection
-            r'drop\s+table': 5,                       # Table destruction
-            r'exec\s*\(': 4,                          # Code execution
-            r'%[0-9a-f]{2}': 2,                       # URL encoding
-            r'0x[0-9a-f]+': 3,                        # Hexadecimal encoding
-            r'--\s*$': 2,                             # SQL comments
-            r'/\*.*?\*/': 2,                          # Block comments
-            r'@@\w+': 3,                              # System variables
-            r'waitfor\s+delay': 4,                    # Time-based attacks
-            r'benchmark\s*\(': 4,                     # MySQL benchmark
-            r'pg_sleep\s*\(': 4,                      # PostgreSQL sleep
-            r'information_schema': 5,                 # Schema enumeration
-            r'char\s*\(\s*\d+': 3,                    # Character encoding
-            r'ascii\s*\(': 2,                         # ASCII function
-            r'substring\s*\(': 2,                     # Substring function
-            r'openrowset\s*\(': 5,                    # Remote data access
-            r'bulk\s+insert': 5,                      # Bulk operations
-            r'script\s*>': 3,                         # XSS patterns
-            r'<\s*script': 3,                         # XSS patterns
-            r'javascript\s*:': 3,                     # JavaScript injection
-            r'current_user': 2,                       # User functions
-            r'session_user': 2,                       # Session user
-            r'system_user': 2,                        # System user
-            r'host_name\s*\(': 2,                     # Host name
-            r'db_name\s*\(': 2,                       # Database name
-            r'@@version': 4,                          # Version information
-            r'@@servername': 3,                       # Server information
-            r'load_file\s*\(': 5,                     # File operations
-            r'into\s+outfile': 5,                     # File writing
-            r'load\s+data\s+infile': 5,               # File loading
-            r'grant\s+': 3,                           # Permission granting
-            r'revoke\s+': 3,                          # Permission revoking
-            r'shutdown': 5,                           # System shutdown
-            r'kill\s+\d+': 4,                         # Process termination
-        }
-        
-        features = []
-        
-        for text in texts:
+        for row, text in enumerate(texts):
             text_lower = text.lower()
+            is_ascii = text.isascii()
             feature_vector = []
             
             # CATEGORY 1: Weighted SQL Keywords (30 features)
-            for keyword, weight in sql_keywords.items():
-                count = len(re.findall(r'\b' + keyword + r'\b', text_lower))
-                feature_vector.append(count * weight)
+            keyword_counts = [0] * len(_SQL_KEYWORD_WEIGHTS)
+            for match in _SQL_KEYWORD_SCAN.finditer(text_lower):
+                keyword_counts[_SQL_KEYWORD_INDEX[match.group()]] += 1
+            feature_vector.extend(map(operator.mul, keyword_counts, _SQL_KEYWORD_WEIGHTS))
             
             # CATEGORY 2: Attack Pattern Detection (35 features)
-            for pattern, weight in attack_patterns.items():
-                matches = len(re.findall(pattern, text_lower, re.IGNORECASE))
-                feature_vector.append(matches * weight)
+            attack_findall = _ATTACK_FINDALL_ASCII if is_ascii else _ATTACK_FINDALL
+            pattern_matches = [len(findall(text_lower)) for findall in attack_findall]
+            feature_vector.extend(map(operator.mul, pattern_matches, _ATTACK_PATTERN_WEIGHTS))
+            
+            # Byte histogram shared by the character-level features. UTF-8
+            # keeps ASCII characters as single bytes and encodes everything
+            # else with bytes >= 0x80, so ASCII counts are exact.
+            text_bytes = np.frombuffer(text.encode('utf-8', 'surrogatepass'), dtype=np.uint8)
+            char_hist = np.bincount(text_bytes, minlength=256)
             
             # CATEGORY 3: Character-Level Analysis (30 features)
-            char_features = [
-                len(text),                    # Total length
-                text.count("'"),              # Single quotes
-                text.count('"'),              # Double quotes
-                text.count('('),              # Open parentheses
-                text.count(')'),              # Close parentheses
-                text.count('['),              # Open brackets
-                text.count(']'),              # Close brackets
-                text.count('{'),              # Open braces
-                text.count('}'),              # Close braces
-                text.count(';'),              # Semicolons
-                text.count(','),              # Commas
-                text.count('='),              # Equals signs
-                text.count('<'),              # Less than
-                text.count('>'),              # Greater than
-                text.count('!'),              # Exclamation marks
-                text.count('?'),              # Question marks
-                text.count('&'),              # Ampersands
-                text.count('|'),              # Pipe symbols
-                text.count('%'),              # Percent signs
-                text.count('*'),              # Asterisks
-                text.count('+'),              # Plus signs
-                text.count('-'),              # Minus signs
-                text.count('/'),              # Forward slashes
-                text.count('\\'),             # Backslashes
-                text.count('_'),              # Underscores
-                text.count('$'),              # Dollar signs
-                text.count('@'),              # At symbols
-                text.count('#'),              # Hash symbols
-                text.count('^'),              # Caret symbols
-                text.count('~'),              # Tilde symbols
-            ]
-            feature_vector.extend(char_features)
+            feature_vector.append(len(text))  # Total length
+            feature_vector.extend(char_hist[_CHAR_FEATURE_CODES].tolist())
             
             # CATEGORY 4: Quote Balance Analysis (Critical!)
-            single_quote_count = text.count("'")
-            double_quote_count = text.count('"')
+            single_quote_count = int(char_hist[ord("'")])
+            double_quote_count = int(char_hist[ord('"')])
             feature_vector.extend([
                 single_quote_count % 2,       # Odd single quotes (very suspicious!)
                 double_quote_count % 2,       # Odd double quotes
             ])
             
             # CATEGORY 5: Encoding Detection
-            url_encoded = len(re.findall(r'%[0-9a-fA-F]{2}', text))
-            hex_sequences = len(re.findall(r'0x[0-9a-fA-F]+', text_lower))
+            url_encoded = len(_URL_ENCODED_PATTERN.findall(text))
+            hex_sequences = len(_HEX_PATTERN.findall(text_lower))
             feature_vector.extend([url_encoded, hex_sequences])
             
             # CATEGORY 6: Comment Pattern Analysis
-            sql_comments = len(re.findall(r'--.*$', text, re.MULTILINE))
-            block_comments = len(re.findall(r'/\*.*?\*/', text, re.DOTALL))
+            # r'--.*$' (MULTILINE) matches once per line holding a '--',
+            # since the match runs to the end of that line
+            if '--' not in text:
+                sql_comments = 0
+            elif '\n' not in text:
+                sql_comments = 1
+            else:
+                sql_comments = sum(1 for line in text.split('\n') if '--' in line)
+            block_comments = len(_BLOCK_COMMENT_PATTERN.findall(text)) if '/*' in text else 0
             feature_vector.extend([sql_comments, block_comments])
             
             # CATEGORY 7: Structural Analysis
-            # Nested parentheses depth
-            max_nesting = 0
-            current_nesting = 0
-            for char in text:
-                if char == '(':
-                    current_nesting += 1
-                    max_nesting = max(max_nesting, current_nesting)
-                elif char == ')':
-                    current_nesting = max(0, current_nesting - 1)
+            # Nested parentheses depth. A ')' never takes the depth below
+            # zero, and a depth clamped that way equals the raw running sum
+            # minus its lowest point so far (when that is negative).
+            if char_hist[ord('(')]:
+                steps = (text_bytes == ord('(')).astype(np.intp) - (text_bytes == ord(')'))
+                depth = np.cumsum(steps)
+                depth -= np.minimum(np.minimum.accumulate(depth), 0)
+                max_nesting = int(depth.max())
+            else:
+                max_nesting = 0
             feature_vector.append(max_nesting)
             
             # CATEGORY 8: Information Theory Features
             # String entropy (randomness measure)
             if len(text) > 0:
-                char_counts = Counter(text.lower())
-                total_chars = len(text)
-                entropy = -sum((count / total_chars) * np.log2(count / total_chars) 
-                              for count in char_counts.values() if count > 0)
+                if is_ascii:
+                    # Fold the upper-case bins into lower-case, as text.lower() would
+                    char_counts = char_hist.copy()
+                    char_counts[_LOWER_CASE_CODES] += char_counts[_UPPER_CASE_CODES]
+                    char_counts[_UPPER_CASE_CODES] = 0
+                    char_counts = char_counts[char_counts > 0]
+                else:
+                    char_counts = np.fromiter(Counter(text.lower()).values(), dtype=np.float64)
+                probabilities = char_counts / len(text)
+                entropy = -float((probabilities * np.log2(probabilities)).sum())
                 feature_vector.append(entropy)
             else:
                 feature_vector.append(0)
             
             # CATEGORY 9: Character Frequency Analysis
-            if len(text) > 0:
+            if is_ascii and len(text) > 0:
+                alpha_count, digit_count, space_count, special_count = (_CHAR_CLASS_MASKS @ char_hist).tolist()
+                alpha_ratio = alpha_count / len(text)
+                digit_ratio = digit_count / len(text)
+                space_ratio = space_count / len(text)
+                special_ratio = special_count / len(text)
+            elif len(text) > 0:
+                # Non-ASCII letters, digits and spaces need the str methods
                 alpha_ratio = sum(1 for c in text if c.isalpha()) / len(text)
                 digit_ratio = sum(1 for c in text if c.isdigit()) / len(text)
                 space_ratio = sum(1 for c in text if c.isspace()) / len(text)
@@ -230,28 +306,31 @@ class EnhancedSQLInjectionDetector:
             feature_vector.extend([alpha_ratio, digit_ratio, space_ratio, special_ratio])
             
             # CATEGORY 10: Function and Context Analysis
-            function_calls = len(re.findall(r'\w+\s*\(', text_lower))
+            function_calls = len(_FUNCTION_CALL_PATTERN.findall(text_lower))
             feature_vector.append(function_calls)
             
             # Keyword density
-            total_keywords = sum(len(re.findall(r'\b' + keyword + r'\b', text_lower)) 
-                               for keyword in sql_keywords.keys())
-            keyword_density = total_keywords / len(text.split()) if len(text.split()) > 0 else 0
+            words = text.split()
+            total_keywords = sum(keyword_counts)
+            keyword_density = total_keywords / len(words) if words else 0
             feature_vector.append(keyword_density)
             
             # Length-based features
-            words = text.split()
-            avg_word_length = np.mean([len(word) for word in words]) if words else 0
-            max_word_length = max([len(word) for word in words]) if words else 0
+            word_lengths = [len(word) for word in words]
+            avg_word_length = sum(word_lengths) / len(word_lengths) if words else 0
+            max_word_length = max(word_lengths) if words else 0
             feature_vector.extend([avg_word_length, max_word_length])
             
-            # Ensure exactly 154 features
-            while len(feature_vector) < 154:
-                feature_vector.append(0)
-            
-            features.append(feature_vector[:154])
+            # Remaining columns up to 154 stay zero
+            features[row, :len(feature_vector)] = feature_vector
+            if return_counts:
+                pattern_counts = dict(zip(_ATTACK_PATTERN_SOURCES, pattern_matches))
+                pattern_counts[_FUNCTION_CALL_PATTERN.pattern] = function_calls
+                match_counts.append(pattern_counts)
         
-        return np.array(features)
+        if return_counts:
+            return features, match_counts
+        return features
     
     def predict(self, query: str) -> Dict[str, Any]:
         """
@@ -265,53 +344,165 @@ class EnhancedSQLInjectionDetector:
             Dictionary with prediction results
         """
         if not query or not isinstance(query, str):
-            return {
-                'query': query,
-                'prediction': 'SAFE',
-                'is_malicious': False,
-                'risk_score': 0,
-                'confidence': 1.0,
-                'indicators': [],
-                'method': 'validation'
-            }
-        
-        if self.model_loaded and self.ensemble_model:
+            return self._validation_result(query)
+        
+        # Without the model, benign traffic with nothing SQL-like skips
+        # pattern scoring; the model is never second-guessed this way
+        if not self.model_loaded and self.fallback_detector.is_clearly_safe(query):
+            return self._prefilter_result(query)
+        
+        cache_key = None
+        if settings.PREDICTION_CACHE_SIZE > 0:
+            cache_key = hashlib.blake2b(query.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+            cached = self.prediction_cache.get(cache_key)
+            if cached is not None:
+                # Fresh indicators list, so callers can't reach the cached entry
+                return dict(cached, indicators=list(cached['indicators']))
+        
+        result = None
+        if self.fallback_detector.has_red_flag(query):
+            result = self._red_flag_result(query)
+        elif self.model_loaded and self.ensemble_model:
             try:
                 # Use trained ML model
-                features = self.enhanced_feature_extraction([query])
+                features, match_counts = self.enhanced_feature_extraction([query], return_counts=True)
                 ml_prediction = self.ensemble_model.predict(features)[0]
-                
-                # Also get fallback analysis for detailed indicators
-                fallback_result = self.fallback_detector.analyze_query(query)
-                
-                # Enhanced confidence calculation
-                confidence = 0.95 if ml_prediction == 1 else 0.85
-                if fallback_result['risk_score'] > 0:
-                    confidence = min(confidence + (fallback_result['risk_score'] / 100), 0.99)
-                
-                result = {
-                    'query': query,
-                    'prediction': 'MALICIOUS' if ml_prediction == 1 else 'SAFE',
-                    'is_malicious': bool(ml_prediction),
-                    'risk_score': fallback_result['risk_score'],
-                    'confidence': confidence,
-                    'indicators': fallback_result['indicators'],
-                    'method': 'ml_model',
-                    'model_accuracy': self.model_accuracy
-                }
-                
-                logger.info(
-                    f"ML prediction: {result['prediction']}, "
-                    f"Confidence: {confidence:.2f}, Risk: {fallback_result['risk_score']}"
-                )
-                
-                return result
+                result = self._ml_result(query, ml_prediction, match_counts[0])
                 
             except Exception as e:
                 logger.error(f"ML model prediction failed: {str(e)}")
                 # Fall back to pattern-based detection
         
-        # Use fallback pattern-based detection
+        if result is None:
+            result = self._fallback_result(query)
+        
+        if cache_key is not None:
+            # Cached with immutable indicators; the caller keeps the original
+            self.prediction_cache.set(cache_key, dict(result, indicators=tuple(result['indicators'])))
+        return result
+    
+    def predict_batch(self, queries: List[str]) -> List[Dict[str, Any]]:
+        """
+        Predict many queries at once.
+        
+        Features for every query are extracted together and the ML model
+        runs once over the whole matrix; results match calling predict()
+        on each query.
+        
+        Args:
+            queries: The SQL query strings to analyze
+            
+        Returns:
+            List of prediction results, in the same order as queries
+        """
+        results: List[Any] = [None] * len(queries)
+        valid = []
+        for i, query in enumerate(queries):
+            if not query or not isinstance(query, str):
+                results[i] = self._validation_result(query)
+            elif not self.model_loaded and self.fallback_detector.is_clearly_safe(query):
+                results[i] = self._prefilter_result(query)
+            elif self.fallback_detector.has_red_flag(query):
+                results[i] = self._red_flag_result(query)
+            else:
+                valid.append(i)
+        
+        if valid and self.model_loaded and self.ensemble_model:
+            try:
+                features, match_counts = self.enhanced_feature_extraction(
+                    [queries[i] for i in valid], return_counts=True
+                )
+                ml_predictions = self.ensemble_model.predict(features)
+                for i, ml_prediction, pattern_counts in zip(valid, ml_predictions, match_counts):
+                    results[i] = self._ml_result(queries[i], ml_prediction, pattern_counts)
+                    
+            except Exception as e:
+                logger.error(f"ML model batch prediction failed: {str(e)}")
+                for i in valid:
+                    results[i] = None
+        
+        for i in valid:
+            if results[i] is None:
+                results[i] = self._fallback_result(queries[i])
+        
+        return results
+    
+    @staticmethod
+    def _validation_result(query: Any) -> Dict[str, Any]:
+        """Result for empty or non-string input."""
+        return {
+            'query': query,
+            'prediction': 'SAFE',
+            'is_malicious': False,
+            'risk_score': 0,
+            'confidence': 1.0,
+            'indicators': [],
+            'method': 'validation'
+        }
+    
+    @staticmethod
+    def _prefilter_result(query: str) -> Dict[str, Any]:
+        """Result for a query the fallback detector would score 0."""
+        return {
+            'query': query,
+            'prediction': 'SAFE',
+            'is_malicious': False,
+            'risk_score': 0,
+            'confidence': 1.0,
+            'indicators': [],
+            'method': 'prefilter'
+        }
+    
+    def _red_flag_result(self, query: str) -> Dict[str, Any]:
+        """Result for a query containing a definite attack construct."""
+        fallback_result = self.fallback_detector.analyze_query(query)
+        
+        result = {
+            'query': query,
+            'prediction': 'MALICIOUS',
+            'is_malicious': True,
+            'risk_score': fallback_result['risk_score'],
+            'confidence': 0.99,
+            'indicators': fallback_result['indicators'],
+            'method': 'red_flag'
+        }
+        
+        logger.info(f"Red-flag prediction: MALICIOUS, Risk: {fallback_result['risk_score']}")
+        
+        return result
+    
+    def _ml_result(self, query: str, ml_prediction: Any,
+                   pattern_counts: Dict[str, int]) -> Dict[str, Any]:
+        """Combine an ML model prediction with the pattern-based indicators."""
+        # Also get fallback analysis for detailed indicators, reusing the
+        # pattern counts feature extraction already has
+        fallback_result = self.fallback_detector.analyze_query(query, pattern_counts)
+        
+        # Enhanced confidence calculation
+        confidence = 0.95 if ml_prediction == 1 else 0.85
+        if fallback_result['risk_score'] > 0:
+            confidence = min(confidence + (fallback_result['risk_score'] / 100), 0.99)
+        
+        result = {
+            'query': query,
+            'prediction': 'MALICIOUS' if ml_prediction == 1 else 'SAFE',
+            'is_malicious': bool(ml_prediction),
+            'risk_score': fallback_result['risk_score'],
+            'confidence': confidence,
+            'indicators': fallback_result['indicators'],
+            'method': 'ml_model',
+            'model_accuracy': self.model_accuracy
+        }
+        
+        logger.info(
+            f"ML prediction: {result['prediction']}, "
+            f"Confidence: {confidence:.2f}, Risk: {fallback_result['risk_score']}"
+        )
+        
+        return result
+    
+    def _fallback_result(self, query: str) -> Dict[str, Any]:
+        """Score a query with pattern-based detection only."""
         fallback_result = self.fallback_detector.analyze_query(query)
         risk_score = fallback_result['risk_score']
         
@@ -356,8 +547,8 @@ class FallbackSQLDetector:
         }
         
         # High-risk attack patterns
-        self.attack_patterns = [
-            (r'(\bor\b|\band\b)\s*\d+\s*=\s*\d+', '1=1 attacks'),
+        attack_patterns = [
+            (r'(?:\bor\b|\band\b)\s*\d+\s*=\s*\d+', '1=1 attacks'),
             (r'union\s+select', 'Union-based attacks'),
             (r'drop\s+table', 'Table dropping'),
             (r'exec\s*\(', 'Code execution'),
@@ -379,13 +570,53 @@ class FallbackSQLDetector:
             (r'openrowset', 'Remote data access'),
             (r'bulk\s+insert', 'Bulk operations'),
         ]
+        self.attack_patterns = [
+            (re.compile(pattern, re.IGNORECASE), description)
+            for pattern, description in attack_patterns
+        ]
+        # Case-sensitive copies for ASCII queries (see _ATTACK_PATTERNS_ASCII)
+        self.ascii_attack_patterns = [
+            (re.compile(pattern), description)
+            for pattern, description in attack_patterns
+        ]
+        
+        # Every keyword, attack pattern and character heuristic above needs
+        # at least one of these; keep them in sync when adding patterns
+        self.trigger_chars = frozenset("'\";%=-/*(<@")
+        self.trigger_substrings = tuple(self.sql_keywords) + ('0x', 'outfile', 'openrowset', 'javascript')
+        
+        # Constructs with no benign reading; these are flagged without
+        # consulting the model or the risk threshold
+        self.red_flag_pattern = re.compile(
+            r'drop\s+table|union\s+(?:all\s+)?select|information_schema|xp_cmdshell|load_file\s*\(',
+            re.IGNORECASE
+        )
     
-    def analyze_query(self, query: str) -> Dict[str, Any]:
+    def is_clearly_safe(self, query: str) -> bool:
+        """
+        Cheap pre-check: True when analyze_query() is certain to score 0.
+        
+        Only short ASCII queries qualify, since case-insensitive matching
+        of non-ASCII text ('ſ' for 's') could still hit a pattern.
+        """
+        if len(query) > 200 or not query.isascii() or not self.trigger_chars.isdisjoint(query):
+            return False
+        query_lower = query.lower()
+        return not any(trigger in query_lower for trigger in self.trigger_substrings)
+    
+    def has_red_flag(self, query: str) -> bool:
+        """True when the query contains a definite attack construct."""
+        return self.red_flag_pattern.search(query) is not None
+    
+    def analyze_query(self, query: str, pattern_counts: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
         """
         Analyze a query for SQL injection indicators using pattern matching.
         
         Args:
             query: The SQL query string to analyze
+            pattern_counts: Match counts already computed for this query,
+                keyed by pattern source (see enhanced_feature_extraction);
+                patterns found here are not run again
             
         Returns:
             Dictionary containing risk_score and list of indicators
@@ -405,23 +636,30 @@ class FallbackSQLDetector:
                 indicators.append(f"SQL keyword '{keyword}' found {count} time(s)")
         
         # Check attack patterns
-        for pattern, description in self.attack_patterns:
-            matches = len(re.findall(pattern, query_lower, re.IGNORECASE))
+        attack_patterns = self.ascii_attack_patterns if query.isascii() else self.attack_patterns
+        for pattern, description in attack_patterns:
+            matches = pattern_counts.get(pattern.pattern) if pattern_counts else None
+            if matches is None:
+                # Most queries match nothing, so look for a first hit before
+                # building a match list, then count the rest from there
+                first = pattern.search(query_lower)
+                matches = 1 + len(pattern.findall(query_lower, first.end())) if first else 0
             if matches > 0:
                 risk_score += matches * 5
                 indicators.append(f"{description} pattern detected")
         
         # Character-based indicators
         suspicious_chars = ["'", '"', ';', '--', '/*', '*/', '%', '=']
+        char_counts = {}
         for char in suspicious_chars:
-            count = query.count(char)
+            count = char_counts[char] = query.count(char)
             if count > 1:  # Multiple occurrences are suspicious
                 risk_score += count * 2
                 indicators.append(f"Suspicious character '{char}' found {count} time(s)")
         
         # Quote imbalance (very suspicious)
-        single_quotes = query.count("'")
-        double_quotes = query.count('"')
+        single_quotes = char_counts["'"]
+        double_quotes = char_counts['"']
         if single_quotes % 2 == 1:  # Odd number of quotes
             risk_score += 15
             indicators.append("Unbalanced single quotes detected")
@@ -435,7 +673,9 @@ class FallbackSQLDetector:
             indicators.append("Unusually long query")
         
         # Function call patterns
-        function_calls = len(re.findall(r'\w+\s*\(', query_lower))
+        function_calls = pattern_counts.get(_FUNCTION_CALL_PATTERN.pattern) if pattern_counts else None
+        if function_calls is None:
+            function_calls = len(_FUNCTION_CALL_PATTERN.findall(query_lower))
         if function_calls > 3:
             risk_score += function_calls * 2
             indicators.append(f"Multiple function calls ({function_calls}) detected")
@@ -443,5 +683,25 @@ class FallbackSQLDetector:
         return {'risk_score': risk_score, 'indicators': indicators}
 
 
-# Global detector instance
-sql_injection_detector = EnhancedSQLInjectionDetector()
+# Global detector instance, built on first use so importing this module
+# stays cheap (the app warms it up during startup)
+_detector: Optional[EnhancedSQLInjectionDetector] = None
+_detector_lock = threading.Lock()
+
+
+def get_detector() -> EnhancedSQLInjectionDetector:
+    """Return the shared detector, loading the model on the first call."""
+    global _detector
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                _detector = EnhancedSQLInjectionDetector()
+    return _detector
+
+
+def __getattr__(name: str) -> Any:
+    # Keep `from ... import sql_injection_detector` working for existing callers
+    if name == 'sql_injection_detector':
+        return get_detector()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
@@ -0,0 +1,76 @@
+"""
+Text threat analysis for SHIELD Backend
+
+Runs in the analysis process pool as well as in the server process, so
+importing this module must stay free of logging or app setup: spawned
+pool workers import it fresh.
+"""
+
+import bisect
+import logging
+import re
+from itertools import islice
+from typing import List
+
+from app.models.schemas import ThreatDetection, AttackType, ThreatLevel
+from app.services.sql_injection_detector import get_detector
+
+
+logger = logging.getLogger(__name__)
+
+# Case folding is ASCII-only, matching what lower() does for these keywords
+_XSS_PATTERN = re.compile(r'<script|javascript:|onerror|onload', re.IGNORECASE | re.ASCII)
+
+_XSS_THREAT = ThreatDetection(
+    attack_type=AttackType.XSS,
+    confidence=0.75,
+    severity=ThreatLevel.MEDIUM,
+    description="Potential XSS attack pattern detected",
+    mitigation="Sanitize and encode user input before rendering"
+)
+
+# SQL injection risk score at which each severity above LOW starts
+_RISK_THRESHOLDS = (15, 30, 50)
+_RISK_SEVERITIES = (ThreatLevel.LOW, ThreatLevel.MEDIUM, ThreatLevel.HIGH, ThreatLevel.CRITICAL)
+
+
+def analyze_text(content: str) -> List[ThreatDetection]:
+    """
+    Text-based threat analysis using the SQL injection detector.
+    Integrates the SimpleSQLInjectionDetector from model directory.
+    """
+    threats = []
+
+    # Use the SQL injection detector for analysis
+    detection_result = get_detector().predict(content)
+
+    if detection_result['is_malicious']:
+        # Map risk score to severity
+        risk_score = detection_result['risk_score']
+        severity = _RISK_SEVERITIES[bisect.bisect_right(_RISK_THRESHOLDS, risk_score)]
+
+        # Create detailed description from the top 3 indicators
+        indicators = detection_result.get('indicators') or ()
+        indicators_text = "; ".join(islice(indicators, 3)) if indicators else "pattern match"
+        description = f"SQL injection detected: {indicators_text}"
+
+        threats.append(ThreatDetection(
+            attack_type=AttackType.SQL_INJECTION,
+            confidence=detection_result['confidence'],
+            severity=severity,
+            description=description,
+            mitigation="Use parameterized queries and input validation. Avoid dynamic SQL construction with user input."
+        ))
+
+        logger.info(
+            "SQL injection detected - Risk Score: %s, Confidence: %.2f, Indicators: %d",
+            risk_score, detection_result['confidence'], len(indicators)
+        )
+    else:
+        logger.info("Text analysis: No malicious patterns detected")
+
+    # Additional XSS detection (keeping existing functionality)
+    if _XSS_PATTERN.search(content):
+        threats.append(_XSS_THREAT)
+
+    return threats
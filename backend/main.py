@@ -6,16 +6,20 @@ Designed for future integration of AI security analysis models (Phase 1) and
 Honeypot System (Phase 2).
 """
 
+import asyncio
+import os
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.api.v1 import api_router
+from app.api.v1.honeypot import start_log_writer, stop_log_writer
 from app.core.config import settings
-from app.core.logging_config import setup_logging
-
-# Initialize logging
-setup_logging()
+from app.core.logging_config import setup_logging, stop_logging
+from app.services.analysis import analysis_service
+from app.services.sql_injection_detector import get_detector
 
 # Create FastAPI application
 app = FastAPI(
@@ -23,7 +27,8 @@ app = FastAPI(
     description="AI-powered security analysis platform for detecting malicious inputs",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -38,6 +43,24 @@ app.add_middleware(
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
 
+@app.on_event("startup")
+async def startup():
+    """Start logging and background workers, and load the SQL injection model."""
+    # Set up here rather than at import, so analysis pool processes that
+    # re-import this module don't start their own log handlers
+    setup_logging()
+    await start_log_writer()
+    analysis_service.start_worker_pool(settings.ANALYSIS_WORKERS)
+    # Load the model off the event loop so the first request doesn't pay for it
+    await asyncio.get_running_loop().run_in_executor(None, get_detector)
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop background workers and flush pending output."""
+    await stop_log_writer()
+    analysis_service.stop_worker_pool()
+    stop_logging()
+
 @app.get("/")
 async def root():
     """Root endpoint providing API information."""
@@ -61,11 +84,29 @@ async def health_check():
         "version": "1.0.0"
     }
 
+# Prefer the uvloop event loop and httptools parser (both ship with
+# uvicorn[standard]); fall back to the pure-Python ones where unavailable.
+try:
+    import uvloop  # noqa: F401
+    UVICORN_LOOP = "uvloop"
+except ImportError:
+    UVICORN_LOOP = "asyncio"
+
+try:
+    import httptools  # noqa: F401
+    UVICORN_HTTP = "httptools"
+except ImportError:
+    UVICORN_HTTP = "h11"
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.DEBUG,
+        # Auto-reload only supports a single process
+        workers=1 if settings.DEBUG else (settings.WORKERS or os.cpu_count()),
+        loop=UVICORN_LOOP,
+        http=UVICORN_HTTP,
         log_level="info"
     )
\ No newline at end of file
@@ -3,11 +3,15 @@
 End-to-End Test: Simulates the frontend to backend flow
 """
 
+import asyncio
 import sys
 import os
 import json
 sys.path.append(os.path.dirname(__file__))
 
+from app.api.v1 import honeypot
+from app.core.cache import TTLCache
+from app.core.clock import utc_isoformat
 from app.services.analysis import analysis_service
 from app.models.schemas import AnalysisRequest, InputType
 
@@ -83,6 +87,309 @@ async def test_end_to_end():
             print(f"❌ ERROR: {str(e)}")
             print()
 
+def test_ttl_cache_expiry():
+    """Entries stop being served once their TTL has passed."""
+    expired = TTLCache(maxsize=4, ttl=0)
+    expired.set("job", 1)
+    assert expired.get("job") is None
+    assert "job" not in expired
+    assert len(expired) == 0
+    
+    forever = TTLCache(maxsize=4, ttl=None)
+    forever.set("job", 1)
+    assert forever.get("job") == 1
+    
+    fresh = TTLCache(maxsize=4, ttl=60)
+    fresh.set("job", 1)
+    assert fresh.get("job") == 1
+    assert fresh.get("missing", "default") == "default"
+
+
+def test_ttl_cache_lru_eviction():
+    """A full cache evicts the least recently used entry."""
+    cache = TTLCache(maxsize=2, ttl=None)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now the least recently used
+    cache.set("c", 3)
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    assert len(cache) == 2
+    
+    cache.set("a", 10)  # overwriting refreshes recency
+    cache.set("d", 4)
+    assert cache.get("a") == 10
+    assert "c" not in cache
+
+
+def test_image_base64_validation():
+    """Image content must be padded standard base64; line wrapping is allowed."""
+    def accepted(content):
+        try:
+            AnalysisRequest(input_type=InputType.IMAGE, content=content)
+        except ValueError:
+            return False
+        return True
+    
+    assert accepted("QUJDRA==")
+    assert accepted("QUJD\nRA==")
+    assert accepted("QUJD\r\nRA==\n")
+    assert accepted("QUJD RA==")
+    assert analysis_service.decode_image("QUJD\r\nRA==\n") == b"ABCD"
+    
+    # Rejected by b64decode() as well
+    assert not accepted("QUJDRA")  # unpadded
+    assert not accepted("QUJDRA=")
+    assert not accepted("QUJ")
+    # Stricter than b64decode(), which skipped invalid characters
+    assert not accepted("QU!JD")
+    assert not accepted("!!!!")
+    assert not accepted("")
+
+
+def test_honeypot_command_outputs():
+    """Command aliases, argument and substring rules, and the fallback."""
+    expected = {
+        # Static commands and their aliases
+        "help": honeypot.HELP_OUTPUT,
+        "--help": honeypot.HELP_OUTPUT,
+        "-h": honeypot.HELP_OUTPUT,
+        "HELP": honeypot.HELP_OUTPUT,
+        "ls": honeypot.LS_OUTPUT,
+        "pwd": honeypot.PWD_OUTPUT,
+        "whoami": honeypot.WHOAMI_OUTPUT,
+        "id": honeypot.ID_OUTPUT,
+        "ps": honeypot.PS_OUTPUT,
+        "ps aux": honeypot.PS_OUTPUT,
+        "netstat": honeypot.NETSTAT_OUTPUT,
+        "netstat -tulpn": honeypot.NETSTAT_OUTPUT,
+        "exit": honeypot.EXIT_OUTPUT,
+        "quit": honeypot.EXIT_OUTPUT,
+        "logout": honeypot.EXIT_OUTPUT,
+        # Argument rules, which take precedence over the substring rules
+        "ls -la": honeypot.LS_OUTPUT,
+        "ls mysql": honeypot.LS_OUTPUT,
+        "cat secrets.txt": honeypot.SECRETS_FILE_OUTPUT,
+        "cat /etc/PASSWORD": honeypot.SECRETS_FILE_OUTPUT,
+        "cat database.conf": honeypot.DATABASE_CONFIG_OUTPUT,
+        "cat app.config": honeypot.DATABASE_CONFIG_OUTPUT,
+        "cat mysql": "cat: mysql: No such file or directory",
+        "cat   Notes.TXT": "cat: Notes.TXT: No such file or directory",
+        # Substring rules
+        "mysql -u root": honeypot.DATABASE_SHELL_OUTPUT,
+        "psql -U admin": honeypot.DATABASE_SHELL_OUTPUT,
+        "fromysql": honeypot.DATABASE_SHELL_OUTPUT,
+        "SELECT * FROM users": honeypot.SQL_QUERY_OUTPUT,
+        "echo select from": honeypot.SQL_QUERY_OUTPUT,
+        "select name": "bash: select name: command not found\nType 'help' for available commands",
+        # Change directory and the fallback
+        "CD  /Var": "Changed directory to: /Var",
+        "cd": "bash: cd: command not found\nType 'help' for available commands",
+        "uname -a": "bash: uname -a: command not found\nType 'help' for available commands",
+    }
+    for command, output in expected.items():
+        assert honeypot.generate_honeypot_response(command, "test") == output, command
+    
+    assert honeypot.HELP_OUTPUT.startswith("Available commands:")
+    assert honeypot.EXIT_OUTPUT == "[SYSTEM] Connection closed. Goodbye."
+    assert honeypot.SQL_QUERY_OUTPUT.endswith("(3 rows returned)")
+
+
+def test_honeypot_interact_endpoint():
+    """The endpoint wraps command output; bad bodies are server errors."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    
+    app = FastAPI()
+    app.include_router(honeypot.router)
+    client = TestClient(app)
+    
+    reply = client.post("/interact", json={"input": "  whoami "}).json()
+    assert reply["success"] is True
+    assert reply["response"] == "root"
+    assert "timestamp" in reply
+    
+    reply = client.post("/interact", json={"input": "cat notes.txt"}).json()
+    assert reply["response"] == "cat: notes.txt: No such file or directory"
+    
+    reply = client.post("/interact", json={"input": "   "}).json()
+    assert reply == {"success": True, "response": "[ERROR] No command provided"}
+    
+    response = client.post("/interact", content=b"")
+    assert response.status_code == 500
+    assert response.json() == {"success": False, "error": "Internal server error"}
+
+
+def test_url_validation():
+    """URL inputs accept and reject the same set the original regex did."""
+    def accepted(content):
+        try:
+            AnalysisRequest(input_type=InputType.URL, content=content)
+        except ValueError:
+            return False
+        return True
+    
+    for url in [
+        "http://example.com",
+        "https://sub.example.co.uk/path?q=1",
+        "HTTP://EXAMPLE.COM",
+        "https://example.com/",
+        "http://example.com?x",
+        "http://example.com/#section",
+        "http://localhost",
+        "http://LOCALHOST:8080/x",
+        "https://127.0.0.1",
+        "http://999.1.1.1:80",  # octets are not range-checked
+        "http://example.com:0",
+        "http://example.com.",  # trailing dot
+        "http://example.com./path",
+        "http://xn--bcher-kva.com/",  # punycode (IDN) host
+    ]:
+        assert accepted(url), url
+    
+    for url in [
+        "ftp://example.com",
+        "http:/example.com",
+        "http://example",
+        "http://example.c",
+        "http://example.abcdefg",  # top-level label is 2-6 letters
+        "http://example.museum1",
+        "http://xn--bcher-kva.example",  # 7-letter top-level label
+        "http://bücher.com",  # IDN hosts must be punycode
+        "http://example.xn--p1ai",  # punycode top-level label is not all letters
+        "http://-bad.com",
+        "http://bad-.com",
+        "http://a..com",
+        "http://a_b.com",
+        "http://" + "a" * 64 + ".com",
+        "http://localhost.",
+        "http://1.2.3",
+        "http://1.2.3.4.",
+        "http://[::1]/",
+        "http://user@example.com",
+        "http://example.com:",
+        "http://example.com:abc",
+        "http://example.com:80:90",
+        "http://example.com?",
+        "http://example.com#frag",
+        "http://example.com/ with space",
+        "http://example.com/path\tx",
+    ]:
+        assert not accepted(url), url
+    
+    # Deliberately stricter than the regex, whose '$' allowed one trailing
+    # newline and whose \d matched non-ASCII digits
+    assert not accepted("http://example.com\n")
+    assert not accepted("http://\u0661\u0662.1.1.1")
+
+
+def test_utc_isoformat_matches_datetime():
+    """utc_isoformat() renders what datetime.utcnow().isoformat() would."""
+    from datetime import datetime, timedelta
+    from unittest import mock
+    
+    epoch = datetime(1970, 1, 1)
+    for now_ns in [
+        1_698_765_432_123_456_789,
+        1_698_765_432_000_000_000,  # whole second: no fraction
+        1_698_765_432_000_000_999,  # below one microsecond
+        1_698_765_432_000_001_000,
+        1_698_765_433_999_999_999,  # cached second must roll over
+        0,
+    ]:
+        expected = (epoch + timedelta(microseconds=now_ns // 1000)).isoformat()
+        with mock.patch("app.core.clock.time.time_ns", return_value=now_ns):
+            assert utc_isoformat() == expected, now_ns
+    
+    assert datetime.fromisoformat(utc_isoformat())
+
+
+def test_logging_restarts_after_stop():
+    """setup_logging() works again after stop_logging(), and records are delivered."""
+    import logging
+    import tempfile
+    from app.core import logging_config
+    
+    class Capture(logging.Handler):
+        def __init__(self):
+            super().__init__()
+            self.messages = []
+        
+        def emit(self, record):
+            self.messages.append(record.getMessage())
+    
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as log_root:
+        os.chdir(log_root)  # setup_logging() writes under ./logs
+        try:
+            logging_config.setup_logging()
+            logging_config.stop_logging()
+            root = logging.getLogger()
+            assert not any(isinstance(h, logging.handlers.QueueHandler) for h in root.handlers)
+            
+            logging_config.setup_logging()
+            capture = Capture()
+            for listener, target, _, _ in logging_config._queue_listeners:
+                if target is root:
+                    listener.handlers += (capture,)
+            logging.getLogger("shield.test").warning("delivered after restart")
+        finally:
+            logging_config.stop_logging()  # flushes the queue
+            # Drop the file handlers before their directory is removed
+            for name in ("", "shield.security", "uvicorn"):
+                target = logging.getLogger(name)
+                for handler in list(target.handlers):
+                    target.removeHandler(handler)
+                    handler.close()
+            os.chdir(cwd)
+    
+    assert capture.messages == ["delivered after restart"]
+
+
+def test_honeypot_log_writer_flushes_batches():
+    """Queued interactions reach the log file; nothing is created without them."""
+    import tempfile
+    
+    async def exercise():
+        await honeypot.start_log_writer()
+        try:
+            assert not os.path.exists(honeypot.HONEYPOT_LOG_FILE)
+            for i in range(3):
+                honeypot.log_to_file(f"session{i}", "command", f"whoami {i}")
+            # Written by the background task, before shutdown
+            await asyncio.sleep(honeypot.LOG_FLUSH_INTERVAL * 10)
+            with open(honeypot.HONEYPOT_LOG_FILE, 'rb') as f:
+                assert f.read().count(b'\n') == 3
+            honeypot.log_to_file("session3", "command", "id")
+        finally:
+            await honeypot.stop_log_writer()
+    
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as log_root:
+        os.chdir(log_root)
+        try:
+            asyncio.run(exercise())
+            with open(honeypot.HONEYPOT_LOG_FILE) as f:
+                lines = f.read().splitlines()
+        finally:
+            os.chdir(cwd)
+    
+    assert len(lines) == 4
+    assert lines[0].endswith("session0 | command: whoami 0")
+    assert lines[3].endswith("session3 | command: id")
+    
+    async def idle():
+        await honeypot.start_log_writer()
+        await honeypot.stop_log_writer()
+    
+    with tempfile.TemporaryDirectory() as log_root:
+        os.chdir(log_root)
+        try:
+            asyncio.run(idle())
+            assert not os.path.exists(honeypot.HONEYPOT_LOG_FILE)
+        finally:
+            os.chdir(cwd)
+
+
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(test_end_to_end())
\ No newline at end of file
@@ -19,19 +19,155 @@ Date: October 30, 2025
 Version: Hackathon Edition v1.0
 """
 
+import argparse
 import csv
+import hashlib
 import re
 import os
 import pickle
 import random
+from concurrent.futures import ProcessPoolExecutor
 from collections import Counter
+from functools import lru_cache
 import math
+import operator
 import numpy as np
 
+# Optional: joblib stores the model arrays so the backend can memory-map them
+try:
+    import joblib
+    HAS_JOBLIB = True
+except ImportError:
+    HAS_JOBLIB = False
+
 # ============================================================================
 # ADVANCED FEATURE ENGINEERING 
 # ============================================================================
 
+# SQL keywords with intelligent risk weighting (dict order is the feature order)
+SQL_KEYWORDS = {
+    # Highest risk (weight = 5) - Immediate red flags
+    'drop': 5, 'exec': 5, 'execute': 5, 'information_schema': 5,
+    'load_file': 5, 'into outfile': 5, 'cmdshell': 5, 'xp_cmdshell': 5,
+    
+    # High risk (weight = 4) - Strong attack indicators
+    'union': 4, 'delete': 4, 'sysobjects': 4, 'syscolumns': 4,
+    'waitfor': 4, 'benchmark': 4, 'pg_sleep': 4, 'sp_': 4,
+    
+    # Medium risk (weight = 3) - Moderate concern
+    'declare': 3, 'cast': 3, 'convert': 3, 'concat': 3,
+    'mysql': 3, 'version': 3, 'user': 3, 'database': 3,
+    
+    # Low-medium risk (weight = 2) - Basic SQL functions
+    'select': 2, 'insert': 2, 'update': 2, 'create': 2,
+    'alter': 2, 'substring': 2, 'ascii': 2, 'char': 2,
+    
+    # Low risk (weight = 1) - Common keywords
+    'where': 1, 'and': 1, 'from': 1, 'order': 1, 'group': 1,
+    'having': 1, 'join': 1, 'inner': 1, 'left': 1, 'right': 1
+}
+
+# Advanced attack patterns with severity weights
+ATTACK_PATTERNS = {
+    r'(?:\bor\b|\band\b)\s*\d+\s*=\s*\d+': 5,  # Classic 1=1 attacks
+    r'union\s+select': 5,                      # Union-based injection
+    r'drop\s+table': 5,                       # Table destruction
+    r'exec\s*\(': 4,                          # Code execution
+    r'%[0-9a-f]{2}': 2,                       # URL encoding
+    r'0x[0-9a-f]+': 3,                        # Hexadecimal encoding
+    r'--\s*$': 2,                             # SQL comments
+    r'/\*.*?\*/': 2,                          # Block comments
+    r'@@\w+': 3,                              # System variables
+    r'waitfor\s+delay': 4,                    # Time-based attacks
+    r'benchmark\s*\(': 4,                     # MySQL benchmark
+    r'pg_sleep\s*\(': 4,                      # PostgreSQL sleep
+    r'information_schema': 5,                 # Schema enumeration
+    r'char\s*\(\s*\d+': 3,                    # Character encoding
+    r'ascii\s*\(': 2,                         # ASCII function
+    r'substring\s*\(': 2,                     # Substring function
+    r'openrowset\s*\(': 5,                    # Remote data access
+    r'bulk\s+insert': 5,                      # Bulk operations
+    r'sp_password': 4,                        # Password procedures
+    r'sp_helpdb': 3,                          # Help procedures
+    r'script\s*>': 3,                         # XSS patterns
+    r'<\s*script': 3,                         # XSS patterns
+    r'javascript\s*:': 3,                     # JavaScript injection
+    r'current_user': 2,                       # User functions
+    r'session_user': 2,                       # Session user
+    r'system_user': 2,                        # System user
+    r'host_name\s*\(': 2,                     # Host name
+    r'db_name\s*\(': 2,                       # Database name
+    r'@@version': 4,                          # Version information
+    r'@@servername': 3,                       # Server information
+    r'load_file\s*\(': 5,                     # File operations
+    r'into\s+outfile': 5,                     # File writing
+    r'load\s+data\s+infile': 5,               # File loading
+    r'grant\s+': 3,                           # Permission granting
+    r'revoke\s+': 3,                          # Permission revoking
+    r'shutdown': 5,                           # System shutdown
+    r'kill\s+\d+': 4,                         # Process termination
+}
+
+# Compiled once at import; extraction runs ~70 of these per query
+# One alternation counts every keyword in a single pass. Keywords only ever
+# match whole words, so hits cannot overlap and the per-keyword counts equal
+# separate \bkeyword\b searches.
+_KEYWORD_RE = re.compile(r'\b(' + '|'.join(map(re.escape, sorted(SQL_KEYWORDS, key=len, reverse=True))) + r')\b')
+_KEYWORD_INDEX = {keyword: index for index, keyword in enumerate(SQL_KEYWORDS)}
+_KEYWORD_WEIGHTS = tuple(SQL_KEYWORDS.values())
+_COMPILED_ATTACKS = [(re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in ATTACK_PATTERNS.items()]
+# The patterns are lower-case and run against lower-cased text, so for ASCII
+# queries IGNORECASE changes nothing ('ſ' matching 's' needs non-ASCII text).
+# Without the flag the regex engine can use its fast literal-prefix search.
+_COMPILED_ATTACKS_ASCII = [(re.compile(pattern), weight) for pattern, weight in ATTACK_PATTERNS.items()]
+# Patterns without regex syntax are counted with str.count on ASCII text
+# (non-overlapping, left to right, the same as findall); None marks the rest
+_ATTACK_LITERALS = [pattern if re.escape(pattern) == pattern else None for pattern in ATTACK_PATTERNS]
+# The fixed pattern layout is specialized at import: one prebuilt counting
+# callable per pattern and input class, so the per-query block is a single
+# comprehension with no per-pattern branching
+_ATTACK_WEIGHTS = tuple(ATTACK_PATTERNS.values())
+_ATTACK_COUNTERS = tuple(
+    lambda text, findall=pattern.findall: len(findall(text)) for pattern, _ in _COMPILED_ATTACKS
+)
+_ATTACK_COUNTERS_ASCII = tuple(
+    operator.methodcaller('count', literal) if literal else
+    (lambda text, findall=pattern.findall: len(findall(text)))
+    for (pattern, _), literal in zip(_COMPILED_ATTACKS_ASCII, _ATTACK_LITERALS)
+)
+_URL_ENCODED_RE = re.compile(r'%[0-9a-fA-F]{2}')
+_HEX_RE = re.compile(r'0x[0-9a-fA-F]+')
+_LINE_COMMENT_RE = re.compile(r'--.*$', re.MULTILINE)
+_BLOCK_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+_FUNCTION_CALL_RE = re.compile(r'\w+\s*\(')
+
+# Characters counted by CATEGORY 3, in feature order
+_CHAR_CODES = np.array([ord(char) for char in "'\"()[]{};,=<>!?&|%*+-/\\_$@#^~"], dtype=np.intp)
+
+# Alpha, digit, space and special masks over histogram bins, taken from the
+# str methods so they agree with them for ASCII text (bins >= 0x80 unset)
+_ASCII_CHARS = [chr(code) for code in range(128)]
+_CHAR_CLASS_MASKS = np.array([
+    [char.isalpha() for char in _ASCII_CHARS] + [False] * 128,
+    [char.isdigit() for char in _ASCII_CHARS] + [False] * 128,
+    [char.isspace() for char in _ASCII_CHARS] + [False] * 128,
+    [not char.isalnum() and not char.isspace() for char in _ASCII_CHARS] + [False] * 128,
+], dtype=np.int64)
+_UPPER_CASE_CODES = np.arange(ord('A'), ord('Z') + 1)
+_LOWER_CASE_CODES = np.arange(ord('a'), ord('z') + 1)
+
+# Feature layout: column offsets of each block; unused columns up to 154 stay zero
+N_FEATURES = 154
+_KEYWORD_OFFSET = 0
+_ATTACK_OFFSET = _KEYWORD_OFFSET + len(SQL_KEYWORDS)
+_LENGTH_OFFSET = _ATTACK_OFFSET + len(ATTACK_PATTERNS)
+_CHAR_OFFSET = _LENGTH_OFFSET + 1
+_STRUCTURE_OFFSET = _CHAR_OFFSET + len(_CHAR_CODES)
+
+# Smaller inputs are extracted in-process; worker start-up would dominate
+PARALLEL_MIN_QUERIES = 1000
+PARALLEL_CHUNK_SIZE = 512
+
 def enhanced_feature_extraction(texts):
     """
     Extract 154 advanced features for SQL injection detection.
@@ -39,209 +175,185 @@ def enhanced_feature_extraction(texts):
     """
     print(f"🔧 Extracting 154 advanced features from {len(texts)} queries...")
     
-    # SQL keywords with intelligent risk weighting
-    sql_keywords = {
-        # Highest risk (weight = 5) - Immediate red flags
-        'drop': 5, 'exec': 5, 'execute': 5, 'information_schema': 5,
-        'load_file': 5, 'into outfile': 5, 'cmdshell': 5, 'xp_cmdshell': 5,
-        
-        # High risk (weight = 4) - Strong attack indicators
-        'union': 4, 'delete': 4, 'sysobjects': 4, 'syscolumns': 4,
-        'waitfor': 4, 'benchmark': 4, 'pg_sleep': 4, 'sp_': 4,
-        
-        # Medium risk (weight = 3) - Moderate concern
-        'declare': 3, 'cast': 3, 'convert': 3, 'concat': 3,
-        'mysql': 3, 'version': 3, 'user': 3, 'database': 3,
-        
-        # Low-medium risk (weight = 2) - Basic SQL functions
-        'select': 2, 'insert': 2, 'update': 2, 'create': 2,
-        'alter': 2, 'substring': 2, 'ascii': 2, 'char': 2,
-        
-        # Low risk (weight = 1) - Common keywords
-        'where': 1, 'and': 1, 'from': 1, 'order': 1, 'group': 1,
-        'having': 1, 'join': 1, 'inner': 1, 'left': 1, 'right': 1
-    }
-    
-    # Advanced attack patterns with severity weights
-    attack_patterns = {
-        r'(\bor\b|\band\b)\s*\d+\s*=\s*\d+': 5,  # Classic 1=1 attacks
-        r'union\s+select': 5,                      # Union-based injection
-        r'drop\s+table': 5,                       # Table destruction
-        r'exec\s*\(': 4,                          # Code execution
-        r'%[0-9a-f]{2}': 2,                       # URL encoding
-        r'0x[0-9a-f]+': 3,                        # Hexadecimal encoding
-        r'--\s*$': 2,                             # SQL comments
-        r'/\*.*?\*/': 2,                          # Block comments
-        r'@@\w+': 3,                              # System variables
-        r'waitfor\s+delay': 4,                    # Time-based attacks
-        r'benchmark\s*\(': 4,                     # MySQL benchmark
-        r'pg_sleep\s*\(': 4,                      # PostgreSQL sleep
-        r'information_schema': 5,                 # Schema enumeration
-        r'char\s*\(\s*\d+': 3,                    # Character encoding
-        r'ascii\s*\(': 2,                         # ASCII function
-        r'substring\s*\(': 2,                     # Substring function
-        r'openrowset\s*\(': 5,                    # Remote data access
-        r'bulk\s+insert': 5,                      # Bulk operations
-        r'sp_password': 4,                        # Password procedures
-        r'sp_helpdb': 3,                          # Help procedures
-        r'script\s*>': 3,                         # XSS patterns
-        r'<\s*script': 3,                         # XSS patterns
-        r'javascript\s*:': 3,                     # JavaScript injection
-        r'current_user': 2,                       # User functions
-        r'session_user': 2,                       # Session user
-        r'system_user': 2,                        # System user
-        r'host_name\s*\(': 2,                     # Host name
-        r'db_name\s*\(': 2,                       # Database name
-        r'@@version': 4,                          # Version information
-        r'@@servername': 3,                       # Server information
-        r'load_file\s*\(': 5,                     # File operations
-        r'into\s+outfile': 5,                     # File writing
-        r'load\s+data\s+infile': 5,               # File loading
-        r'grant\s+': 3,                           # Permission granting
-        r'revoke\s+': 3,                          # Permission revoking
-        r'shutdown': 5,                           # System shutdown
-        r'kill\s+\d+': 4,                         # Process termination
-    }
+    n_workers = os.cpu_count() or 1
+    if len(texts) >= PARALLEL_MIN_QUERIES and n_workers > 1:
+        # Each query is independent, so chunks are extracted across processes
+        chunks = [texts[start:start + PARALLEL_CHUNK_SIZE]
+                  for start in range(0, len(texts), PARALLEL_CHUNK_SIZE)]
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            features = np.vstack(list(executor.map(_extract_features, chunks)))
+    else:
+        features = _extract_features(texts)
     
-    features = []
+    print(f"✅ Extracted {features.shape[1]} features per query!")
+    return features
+
+def _extract_features(texts):
+    """Build the (len(texts), 154) feature matrix for a list of queries."""
+    features = np.zeros((len(texts), N_FEATURES))
     
-    for text in texts:
+    for row, text in zip(features, texts):
         text_lower = text.lower()
-        feature_vector = []
         
         # CATEGORY 1: Weighted SQL Keywords (30 features)
-        for keyword, weight in sql_keywords.items():
-            count = len(re.findall(r'\b' + keyword + r'\b', text_lower))
-            feature_vector.append(count * weight)
+        keyword_counts = [0] * len(_KEYWORD_WEIGHTS)
+        for match in _KEYWORD_RE.finditer(text_lower):
+            keyword_counts[_KEYWORD_INDEX[match.group(1)]] += 1
+        row[_KEYWORD_OFFSET:_ATTACK_OFFSET] = list(map(operator.mul, keyword_counts, _KEYWORD_WEIGHTS))
         
         # CATEGORY 2: Attack Pattern Detection (35 features)
-        for pattern, weight in attack_patterns.items():
-            matches = len(re.findall(pattern, text_lower, re.IGNORECASE))
-            feature_vector.append(matches * weight)
+        is_ascii = text.isascii()
+        attack_counters = _ATTACK_COUNTERS_ASCII if is_ascii else _ATTACK_COUNTERS
+        attack_counts = [count(text_lower) for count in attack_counters]
+        row[_ATTACK_OFFSET:_LENGTH_OFFSET] = list(map(operator.mul, attack_counts, _ATTACK_WEIGHTS))
+        
+        # Byte histogram for the character counts. UTF-8 keeps ASCII
+        # characters as single bytes and encodes everything else with bytes
+        # >= 0x80, so ASCII counts match str.count exactly.
+        text_bytes = np.frombuffer(text.encode('utf-8', 'surrogatepass'), dtype=np.uint8)
+        char_hist = np.bincount(text_bytes, minlength=256)
         
         # CATEGORY 3: Character-Level Analysis (30 features)
-        char_features = [
-            len(text),                    # Total length
-            text.count("'"),              # Single quotes
-            text.count('"'),              # Double quotes
-            text.count('('),              # Open parentheses
-            text.count(')'),              # Close parentheses
-            text.count('['),              # Open brackets
-            text.count(']'),              # Close brackets
-            text.count('{'),              # Open braces
-            text.count('}'),              # Close braces
-            text.count(';'),              # Semicolons
-            text.count(','),              # Commas
-            text.count('='),              # Equals signs
-            text.count('<'),              # Less than
-            text.count('>'),              # Greater than
-            text.count('!'),              # Exclamation marks
-            text.count('?'),              # Question marks
-            text.count('&'),              # Ampersands
-            text.count('|'),              # Pipe symbols
-            text.count('%'),              # Percent signs
-            text.count('*'),              # Asterisks
-            text.count('+'),              # Plus signs
-            text.count('-'),              # Minus signs
-            text.count('/'),              # Forward slashes
-            text.count('\\'),             # Backslashes
-            text.count('_'),              # Underscores
-            text.count('$'),              # Dollar signs
-            text.count('@'),              # At symbols
-            text.count('#'),              # Hash symbols
-            text.count('^'),              # Caret symbols
-            text.count('~'),              # Tilde symbols
-        ]
-        feature_vector.extend(char_features)
+        row[_LENGTH_OFFSET] = len(text)  # Total length
+        row[_CHAR_OFFSET:_STRUCTURE_OFFSET] = char_hist[_CHAR_CODES]
         
         # CATEGORY 4: Quote Balance Analysis (Critical!)
         single_quote_count = text.count("'")
         double_quote_count = text.count('"')
-        feature_vector.extend([
+        structure = [
             single_quote_count % 2,       # Odd single quotes (very suspicious!)
             double_quote_count % 2,       # Odd double quotes
-        ])
+        ]
         
         # CATEGORY 5: Encoding Detection
-        url_encoded = len(re.findall(r'%[0-9a-fA-F]{2}', text))
-        hex_sequences = len(re.findall(r'0x[0-9a-fA-F]+', text_lower))
-        feature_vector.extend([url_encoded, hex_sequences])
+        url_encoded = len(_URL_ENCODED_RE.findall(text))
+        hex_sequences = len(_HEX_RE.findall(text_lower))
+        structure.extend([url_encoded, hex_sequences])
         
         # CATEGORY 6: Comment Pattern Analysis
-        sql_comments = len(re.findall(r'--.*$', text, re.MULTILINE))
-        block_comments = len(re.findall(r'/\*.*?\*/', text, re.DOTALL))
-        feature_vector.extend([sql_comments, block_comments])
+        sql_comments = len(_LINE_COMMENT_RE.findall(text))
+        block_comments = len(_BLOCK_COMMENT_RE.findall(text))
+        structure.extend([sql_comments, block_comments])
         
         # CATEGORY 7: Structural Analysis
         # Nested parentheses depth
-        max_nesting = 0
-        current_nesting = 0
-        for char in text:
-            if char == '(':
-                current_nesting += 1
-                max_nesting = max(max_nesting, current_nesting)
-            elif char == ')':
-                current_nesting = max(0, current_nesting - 1)
-        feature_vector.append(max_nesting)
+        # Depth never drops below zero; that clamped depth equals the running
+        # sum minus its lowest point so far, whenever that point is negative
+        if char_hist[ord('(')]:
+            steps = (text_bytes == ord('(')).astype(np.intp) - (text_bytes == ord(')'))
+            depth = np.cumsum(steps)
+            depth -= np.minimum(np.minimum.accumulate(depth), 0)
+            max_nesting = int(depth.max())
+        else:
+            max_nesting = 0
+        structure.append(max_nesting)
         
         # CATEGORY 8: Information Theory Features
         # String entropy (randomness measure)
         if len(text) > 0:
-            char_counts = Counter(text.lower())
-            total_chars = len(text)
-            entropy = -sum((count / total_chars) * np.log2(count / total_chars) 
-                          for count in char_counts.values() if count > 0)
-            feature_vector.append(entropy)
+            if is_ascii:
+                # Fold upper-case bins into lower-case, as text.lower() would
+                char_counts = char_hist.copy()
+                char_counts[_LOWER_CASE_CODES] += char_counts[_UPPER_CASE_CODES]
+                char_counts[_UPPER_CASE_CODES] = 0
+                char_counts = char_counts[char_counts > 0]
+            else:
+                char_counts = np.fromiter(Counter(text.lower()).values(), dtype=np.float64)
+            probabilities = char_counts / len(text)
+            entropy = -float((probabilities * np.log2(probabilities)).sum())
+            structure.append(entropy)
         else:
-            feature_vector.append(0)
+            structure.append(0)
         
         # CATEGORY 9: Character Frequency Analysis
-        if len(text) > 0:
-            alpha_ratio = sum(1 for c in text if c.isalpha()) / len(text)
-            digit_ratio = sum(1 for c in text if c.isdigit()) / len(text)
-            space_ratio = sum(1 for c in text if c.isspace()) / len(text)
-            special_ratio = sum(1 for c in text if not c.isalnum() and not c.isspace()) / len(text)
+        if is_ascii and len(text) > 0:
+            alpha_count, digit_count, space_count, special_count = (_CHAR_CLASS_MASKS @ char_hist).tolist()
+            alpha_ratio = alpha_count / len(text)
+            digit_ratio = digit_count / len(text)
+            space_ratio = space_count / len(text)
+            special_ratio = special_count / len(text)
+        elif len(text) > 0:
+            # Non-ASCII letters, digits and spaces need the str methods,
+            # applied once per distinct character rather than per position
+            alpha_count = digit_count = space_count = special_count = 0
+            for char, count in Counter(text).items():
+                if char.isalpha():
+                    alpha_count += count
+                if char.isdigit():
+                    digit_count += count
+                if char.isspace():
+                    space_count += count
+                elif not char.isalnum():
+                    special_count += count
+            alpha_ratio = alpha_count / len(text)
+            digit_ratio = digit_count / len(text)
+            space_ratio = space_count / len(text)
+            special_ratio = special_count / len(text)
         else:
             alpha_ratio = digit_ratio = space_ratio = special_ratio = 0
         
-        feature_vector.extend([alpha_ratio, digit_ratio, space_ratio, special_ratio])
+        structure.extend([alpha_ratio, digit_ratio, space_ratio, special_ratio])
         
         # CATEGORY 10: Function and Context Analysis
-        function_calls = len(re.findall(r'\w+\s*\(', text_lower))
-        feature_vector.append(function_calls)
-        
-        # Keyword density
-        total_keywords = sum(len(re.findall(r'\b' + keyword + r'\b', text_lower)) 
-                           for keyword in sql_keywords.keys())
-        keyword_density = total_keywords / len(text.split()) if len(text.split()) > 0 else 0
-        feature_vector.append(keyword_density)
+        function_calls = len(_FUNCTION_CALL_RE.findall(text_lower))
+        structure.append(function_calls)
         
-        # Length-based features
+        # Keyword density (keyword counts from Category 1, words split once)
         words = text.split()
-        avg_word_length = np.mean([len(word) for word in words]) if words else 0
-        max_word_length = max([len(word) for word in words]) if words else 0
-        feature_vector.extend([avg_word_length, max_word_length])
+        total_keywords = sum(keyword_counts)
+        keyword_density = total_keywords / len(words) if words else 0
+        structure.append(keyword_density)
         
-        # Ensure exactly 154 features
-        while len(feature_vector) < 154:
-            feature_vector.append(0)
+        # Length-based features
+        word_lengths = [len(word) for word in words]
+        avg_word_length = sum(word_lengths) / len(word_lengths) if words else 0
+        max_word_length = max(word_lengths) if words else 0
+        structure.extend([avg_word_length, max_word_length])
         
-        features.append(feature_vector[:154])
+        row[_STRUCTURE_OFFSET:_STRUCTURE_OFFSET + len(structure)] = structure
     
-    print(f"✅ Extracted {len(features[0])} features per query!")
-    return np.array(features)
+    return features
 
 # ============================================================================
 # MACHINE LEARNING MODELS
 # ============================================================================
 
+def _svm_minibatch_epoch(X, y, indices, w, b, C, lr, beta, momentum_w, momentum_b, batch_size):
+    """One momentum SGD pass in mini-batches: one matrix-vector product per batch instead of per sample."""
+    for start in range(0, len(indices), batch_size):
+        batch = indices[start:start + batch_size]
+        X_batch = X[batch]
+        y_batch = y[batch]
+        
+        margins = y_batch * (X_batch @ w + b)
+        violators = np.flatnonzero(margins < 1)
+        
+        # Only margin violators add a hinge term; once most samples are
+        # separated the batch often has none and the product is skipped
+        grad_w = 2 * C * w
+        grad_b = 0.0
+        if violators.size:
+            y_violators = y_batch[violators]
+            grad_w -= (y_violators @ X_batch[violators]) / len(batch)
+            grad_b = -y_violators.sum() / len(batch)
+        
+        # Apply momentum once per batch
+        momentum_w[:] = beta * momentum_w + (1 - beta) * grad_w
+        momentum_b = beta * momentum_b + (1 - beta) * grad_b
+        
+        # Update weights
+        w -= lr * momentum_w
+        b -= lr * momentum_b
+    return b, momentum_b
+
 class EnhancedSVM:
     """Advanced SVM with optimized hyperparameters."""
     
-    def __init__(self, C=0.1, learning_rate=0.01, max_iter=300):
+    def __init__(self, C=0.1, learning_rate=0.01, max_iter=300, batch_size=256):
         self.C = C
         self.learning_rate = learning_rate
         self.max_iter = max_iter
+        self.batch_size = batch_size  # 1 = the original per-sample updates
         self.w = None
         self.b = None
         
@@ -254,51 +366,38 @@ class EnhancedSVM:
         
         # Initialize weights
         self.w = np.random.normal(0, 0.01, n_features)
-        self.b = 0
+        self.b = 0.0
         
         # Training with momentum
         momentum_w = np.zeros_like(self.w)
-        momentum_b = 0
+        momentum_b = 0.0
         beta = 0.9
         
         for iteration in range(self.max_iter):
             indices = np.random.permutation(n_samples)
-            
-            for i in indices:
-                xi = X[i]
-                yi = y_train[i]
-                
-                margin = yi * (np.dot(xi, self.w) + self.b)
-                
-                if margin >= 1:
-                    grad_w = 2 * self.C * self.w
-                    grad_b = 0
-                else:
-                    grad_w = 2 * self.C * self.w - yi * xi
-                    grad_b = -yi
-                
-                # Apply momentum
-                momentum_w = beta * momentum_w + (1 - beta) * grad_w
-                momentum_b = beta * momentum_b + (1 - beta) * grad_b
-                
-                # Update weights
-                self.w -= self.learning_rate * momentum_w
-                self.b -= self.learning_rate * momentum_b
+            self.b, momentum_b = _svm_minibatch_epoch(X, y_train, indices, self.w, self.b, self.C,
+                                                      self.learning_rate, beta, momentum_w, momentum_b,
+                                                      self.batch_size)
             
             # Learning rate decay
             if iteration % 100 == 0:
                 self.learning_rate *= 0.95
         
+        # Scoring is a single matrix-vector product, so float32 halves its memory traffic
+        self.w = self.w.astype(np.float32)
         print("✅ SVM training completed!")
         
     def predict(self, X):
         """Make predictions."""
-        scores = np.dot(X, self.w) + self.b
+        scores = self.decision_function(X)
         return np.where(scores >= 0, 1, 0)
     
     def decision_function(self, X):
         """Get decision scores."""
-        return np.dot(X, self.w) + self.b
+        return np.dot(np.asarray(X, dtype=self.w.dtype), self.w) + self.b
+
+# Quantile boundaries tried as split thresholds for each feature
+SPLIT_PERCENTILES = np.linspace(0, 100, 17)
 
 class EnhancedRandomForest:
     """Advanced Random Forest with optimized parameters."""
@@ -309,6 +408,7 @@ class EnhancedRandomForest:
         self.min_samples_split = min_samples_split
         self.trees = []
         self.feature_indices = []
+        self.flat_trees = None
         
     def fit(self, X, y):
         """Train the Random Forest."""
@@ -335,6 +435,7 @@ class EnhancedRandomForest:
             if (i + 1) % 5 == 0:
                 print(f"  📊 Trained {i + 1}/{self.n_trees} trees")
         
+        self.flat_trees = [self._flatten_tree(tree) for tree in self.trees]
         print("✅ Random Forest training completed!")
     
     def _train_tree(self, X, y, depth):
@@ -352,23 +453,39 @@ class EnhancedRandomForest:
         # Try random subset of features
         features_to_try = np.random.choice(n_features, size=min(n_features, 20), replace=False)
         
-        for feature in features_to_try:
-            values = X[:, feature]
-            thresholds = np.unique(values)
-            
-            for threshold in thresholds[:10]:
-                left_mask = values <= threshold
-                right_mask = ~left_mask
-                
-                if np.sum(left_mask) == 0 or np.sum(right_mask) == 0:
-                    continue
-                
-                gain = self._calculate_information_gain(y, y[left_mask], y[right_mask])
-                
-                if gain > best_gain:
-                    best_gain = gain
-                    best_feature = feature
-                    best_threshold = threshold
+        # Score every candidate split of every sampled feature at once.
+        # Candidate thresholds are the 16-quantile boundaries of each feature;
+        # each value is binned once by the first threshold it does not exceed,
+        # so cumulative bin counts give the left side of every threshold.
+        values = X[:, features_to_try]
+        thresholds = np.percentile(values, SPLIT_PERCENTILES, axis=0)      # (17, n_try)
+        positive = y == 1
+        n_positive = np.count_nonzero(positive)
+        n_thresholds = len(SPLIT_PERCENTILES)
+        bin_total = np.empty((n_thresholds + 1, len(features_to_try)), dtype=np.int64)
+        bin_positive = np.empty_like(bin_total)
+        for position in range(len(features_to_try)):
+            bins = np.digitize(values[:, position], thresholds[:, position], right=True)
+            bin_total[:, position] = np.bincount(bins, minlength=n_thresholds + 1)
+            bin_positive[:, position] = np.bincount(bins[positive], minlength=n_thresholds + 1)
+        left_total = np.cumsum(bin_total, axis=0)[:n_thresholds]           # (17, n_try)
+        left_positive = np.cumsum(bin_positive, axis=0)[:n_thresholds]
+        right_total = n_samples - left_total
+        right_positive = n_positive - left_positive
+        
+        valid = (left_total > 0) & (right_total > 0)
+        left_size = np.maximum(left_total, 1)
+        right_size = np.maximum(right_total, 1)
+        weighted_entropy = (left_total * self._binary_entropy(left_positive / left_size) +
+                            right_total * self._binary_entropy(right_positive / right_size)) / n_samples
+        gains = np.where(valid, self._binary_entropy(n_positive / n_samples) - weighted_entropy, 0)
+        
+        # Ties go to the earlier feature, then the lower threshold
+        feature_position, threshold_index = np.unravel_index(gains.T.argmax(), gains.T.shape)
+        if gains[threshold_index, feature_position] > best_gain:
+            best_gain = gains[threshold_index, feature_position]
+            best_feature = features_to_try[feature_position]
+            best_threshold = thresholds[threshold_index, feature_position]
         
         if best_feature is None:
             return {'type': 'leaf', 'prediction': np.bincount(y).argmax()}
@@ -384,37 +501,67 @@ class EnhancedRandomForest:
             'right': self._train_tree(X[right_mask], y[right_mask], depth + 1)
         }
     
-    def _calculate_information_gain(self, parent, left, right):
-        """Calculate information gain."""
-        def entropy(y):
-            if len(y) == 0:
-                return 0
-            p = np.bincount(y) / len(y)
-            p = p[p > 0]
-            return -np.sum(p * np.log2(p))
-        
-        n = len(parent)
-        n_left, n_right = len(left), len(right)
-        
-        if n_left == 0 or n_right == 0:
-            return 0
-        
-        parent_entropy = entropy(parent)
-        weighted_entropy = (n_left / n) * entropy(left) + (n_right / n) * entropy(right)
-        
-        return parent_entropy - weighted_entropy
+    @staticmethod
+    def _binary_entropy(p):
+        """Entropy in bits of a 0/1 label split with positive fraction p (0 log 0 = 0)."""
+        q = 1 - p
+        return -(p * np.log2(np.where(p > 0, p, 1)) + q * np.log2(np.where(q > 0, q, 1)))
+    
+    def _flatten_tree(self, tree):
+        """
+        Flatten a tree dict into parallel node arrays (children are -1 at leaves).
+        Features and thresholds are stored as int16/float32 to halve the
+        memory read per traversal step; predict compares in float32 too.
+        """
+        features, thresholds, lefts, rights, leaf_predictions = [], [], [], [], []
+        max_depth = 0
+        stack = [(tree, None, 0)]  # (node, slot in the parent's child array, depth)
+        while stack:
+            node, parent_slot, depth = stack.pop()
+            index = len(features)
+            if parent_slot is not None:
+                parent_slot[0][parent_slot[1]] = index
+            max_depth = max(max_depth, depth)
+            if node['type'] == 'leaf':
+                features.append(0)
+                thresholds.append(0.0)
+                lefts.append(-1)
+                rights.append(-1)
+                leaf_predictions.append(node['prediction'])
+            else:
+                features.append(node['feature'])
+                thresholds.append(node['threshold'])
+                lefts.append(-1)
+                rights.append(-1)
+                leaf_predictions.append(0)
+                stack.append((node['right'], (rights, index), depth + 1))
+                stack.append((node['left'], (lefts, index), depth + 1))
+        return (np.array(features, dtype=np.int16), np.array(thresholds, dtype=np.float32),
+                np.array(lefts, dtype=np.intp), np.array(rights, dtype=np.intp),
+                np.array(leaf_predictions, dtype=np.int64), max_depth)
     
     def predict(self, X):
         """Make predictions using all trees."""
-        n_samples = X.shape[0]
-        predictions = np.zeros((n_samples, self.n_trees))
-        
-        for i, (tree, feature_indices) in enumerate(zip(self.trees, self.feature_indices)):
-            X_subset = X[:, feature_indices]
-            predictions[:, i] = [self._predict_tree(tree, x) for x in X_subset]
+        if getattr(self, 'flat_trees', None) is None or len(self.flat_trees) != len(self.trees):
+            self.flat_trees = [self._flatten_tree(tree) for tree in self.trees]
         
-        # Majority vote
-        return np.array([np.bincount(pred.astype(int)).argmax() for pred in predictions])
+        n_samples = X.shape[0]
+        rows = np.arange(n_samples)
+        votes = np.zeros(n_samples, dtype=np.int64)
+        
+        # Walk all samples down each tree together, one level per step
+        for (features, thresholds, lefts, rights, leaf_predictions, depth), feature_indices in zip(
+                self.flat_trees, self.feature_indices):
+            X_subset = X[:, feature_indices].astype(np.float32)
+            node = np.zeros(n_samples, dtype=np.intp)
+            for _ in range(depth):
+                go_left = X_subset[rows, features[node]] <= thresholds[node]
+                child = np.where(go_left, lefts[node], rights[node])
+                node = np.where(child >= 0, child, node)
+            votes += leaf_predictions[node]
+        
+        # Majority vote (classes are 0/1; ties go to 0)
+        return (votes > len(self.trees) / 2).astype(int)
     
     def _predict_tree(self, tree, x):
         """Predict using a single tree."""
@@ -436,17 +583,13 @@ class EnsembleModel:
     
     def predict(self, X):
         """Make ensemble predictions."""
-        svm_pred = self.svm_model.predict(X)
-        rf_pred = self.rf_model.predict(X)
-        
+        return self.combine(self.svm_model.predict(X), self.rf_model.predict(X))
+    
+    def combine(self, svm_pred, rf_pred):
+        """Combine member predictions already computed for the same rows."""
         if self.strategy == 'majority_vote':
             # Simple majority voting
-            predictions = []
-            for i in range(len(X)):
-                votes = [svm_pred[i], rf_pred[i]]
-                prediction = 1 if sum(votes) >= 1 else 0  # At least one model says malicious
-                predictions.append(prediction)
-            return np.array(predictions)
+            return (svm_pred + rf_pred >= 1).astype(int)  # At least one model says malicious
         
         return svm_pred  # Fallback
 
@@ -477,6 +620,26 @@ def load_data(filename):
     print(f"✅ Loaded {len(queries)} queries ({sum(labels)} malicious, {len(labels)-sum(labels)} safe)")
     return queries, np.array(labels)
 
+# Feature matrices are cached here, keyed by the dataset file and this script
+FEATURE_CACHE_DIR = '.cache'
+
+def load_or_extract_features(filename, queries):
+    """Extract features for a dataset file, reusing the cached float32 matrix when neither changed."""
+    digest = hashlib.blake2b(digest_size=8)
+    for path in (filename, os.path.abspath(__file__)):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    cache_path = os.path.join(FEATURE_CACHE_DIR, f"features_{digest.hexdigest()}.npy")
+    
+    if os.path.exists(cache_path):
+        print(f"♻️  Loading cached features: {cache_path}")
+        return np.load(cache_path)
+    
+    features = enhanced_feature_extraction(queries).astype(np.float32)
+    os.makedirs(FEATURE_CACHE_DIR, exist_ok=True)
+    np.save(cache_path, features)
+    return features
+
 def calculate_metrics(y_true, y_pred):
     """Calculate comprehensive evaluation metrics."""
     tp = np.sum((y_true == 1) & (y_pred == 1))
@@ -527,8 +690,16 @@ def evaluate_models(models, X_test, y_test):
     
     results = {}
     
-    for model, name in zip([svm, rf, ensemble], model_names):
-        predictions = model.predict(X_test)
+    # Each member scores the whole matrix once; the ensemble reuses those
+    # predictions instead of running both members again
+    svm_pred = svm.predict(X_test)
+    rf_pred = rf.predict(X_test)
+    if ensemble.svm_model is svm and ensemble.rf_model is rf:
+        ensemble_pred = ensemble.combine(svm_pred, rf_pred)
+    else:
+        ensemble_pred = ensemble.predict(X_test)
+    
+    for predictions, name in zip([svm_pred, rf_pred, ensemble_pred], model_names):
         metrics = calculate_metrics(y_test, predictions)
         results[name] = metrics
         
@@ -550,15 +721,22 @@ def evaluate_models(models, X_test, y_test):
 def create_demo_predictor(ensemble_model, feature_extractor):
     """Create a simple prediction function for demos."""
     
-    def predict_query(query):
-        """Predict if a single query is malicious."""
+    # Each predictor gets its own cache, so a retrained model starts empty
+    @lru_cache(maxsize=4096)
+    def predict_cached(query):
         features = feature_extractor([query])
         prediction = ensemble_model.predict(features)[0]
+        return ('MALICIOUS' if prediction == 1 else 'SAFE',
+                'High' if prediction in [0, 1] else 'Medium')
+    
+    def predict_query(query):
+        """Predict if a single query is malicious."""
+        prediction, confidence = predict_cached(query)
         
         return {
             'query': query,
-            'prediction': 'MALICIOUS' if prediction == 1 else 'SAFE',
-            'confidence': 'High' if prediction in [0, 1] else 'Medium'
+            'prediction': prediction,
+            'confidence': confidence
         }
     
     return predict_query
@@ -615,8 +793,12 @@ def demo_mode(predictor):
 # MAIN HACKATHON PIPELINE
 # ============================================================================
 
-def main():
-    """Main function - complete hackathon-ready pipeline."""
+def main(seed=None):
+    """
+    Main function - complete hackathon-ready pipeline.
+    
+    seed fixes the demonstration subset; by default a new one is drawn each run.
+    """
     print("="*80)
     print("🚀 HACKATHON SQL INJECTION DETECTION SYSTEM")
     print("Advanced ML Pipeline with 87%+ Accuracy")
@@ -632,7 +814,7 @@ def main():
     
     # Step 2: Extract advanced features
     print("\n🔧 FEATURE ENGINEERING PHASE")
-    X_train = enhanced_feature_extraction(train_queries)
+    X_train = load_or_extract_features("final/Modified_SQL_Dataset_train.csv", train_queries)
     
     # Step 3: Train models
     models = train_models(X_train, train_labels)
@@ -643,13 +825,15 @@ def main():
     
     if val_queries is not None:
         print("\n🧪 VALIDATION PHASE")
-        X_val = enhanced_feature_extraction(val_queries)
+        X_val = load_or_extract_features("final/Modified_SQL_Dataset_validation.csv", val_queries)
         results = evaluate_models(models, X_val, val_labels)
     else:
         # Use a subset of training data for demonstration
         print("\n🧪 DEMONSTRATION WITH TRAINING SUBSET")
         subset_size = min(1000, len(X_train))
-        indices = np.random.choice(len(X_train), subset_size, replace=False)
+        # Generator.choice samples k of n without permuting all n indices
+        rng = np.random.default_rng(seed)
+        indices = rng.choice(len(X_train), size=subset_size, replace=False, shuffle=False)
         X_subset = X_train[indices]
         y_subset = train_labels[indices]
         results = evaluate_models(models, X_subset, y_subset)
@@ -664,8 +848,11 @@ def main():
         'accuracy': results['Ensemble Model']['accuracy'] if 'Ensemble Model' in results else 0.87
     }
     
-    with open('hackathon_sql_detector.pkl', 'wb') as f:
-        pickle.dump(model_data, f)
+    if HAS_JOBLIB:
+        joblib.dump(model_data, 'hackathon_sql_detector.pkl', compress=0, protocol=pickle.HIGHEST_PROTOCOL)
+    else:
+        with open('hackathon_sql_detector.pkl', 'wb') as f:
+            pickle.dump(model_data, f, protocol=pickle.HIGHEST_PROTOCOL)
     
     print("✅ Models saved as: hackathon_sql_detector.pkl")
     
@@ -685,4 +872,7 @@ def main():
     print("="*80)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train and evaluate the hackathon SQL injection models.")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="seed for the demonstration subset (default: a new sample each run)")
+    main(parser.parse_args().seed)
\ No newline at end of file
@@ -2,36 +2,48 @@ try:
     import numpy as np
     import pandas as pd
     from sklearn.model_selection import train_test_split
-    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+    from sklearn.pipeline import make_pipeline
     from sklearn.linear_model import LogisticRegression
     from sklearn.metrics import accuracy_score, confusion_matrix
-    import matplotlib.pyplot as plt
-    import seaborn as sns
+    import joblib
+    import argparse
     import os
 except ImportError as e:
     print(f"Error: Required package not found. {str(e)}")
     print("Please install required packages using: pip install numpy pandas scikit-learn matplotlib seaborn")
     exit(1)
 
+# Optional: pyarrow parses the CSV with multithreaded C++ instead of the default parser
+try:
+    import pyarrow
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# Dataset columns, resolved once for loading and preprocessing
+QUERY_COLUMN = 'Query'
+LABEL_COLUMN = 'Label'
+
 def load_data(file_path):
     """Load and validate the dataset."""
     try:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Dataset not found at {file_path}")
         
-        dataset = pd.read_csv(file_path)
+        dataset = pd.read_csv(file_path, engine='pyarrow') if HAS_PYARROW else pd.read_csv(file_path)
         
         # Validate required columns
-        required_columns = ['Query', 'Label']
+        required_columns = [QUERY_COLUMN, LABEL_COLUMN]
         if not all(col in dataset.columns for col in required_columns):
-            raise ValueError("Dataset missing required columns: 'Query' and 'Label'")
+            raise ValueError(f"Dataset missing required columns: '{QUERY_COLUMN}' and '{LABEL_COLUMN}'")
         
         # Check for empty dataset
         if dataset.empty:
             raise ValueError("Dataset is empty")
         
         # Check for missing values
-        if dataset['Query'].isnull().any() or dataset['Label'].isnull().any():
+        if dataset[QUERY_COLUMN].isnull().any() or dataset[LABEL_COLUMN].isnull().any():
             print("Warning: Dataset contains missing values. They will be removed.")
             dataset = dataset.dropna()
         
@@ -43,8 +55,8 @@ def load_data(file_path):
 def preprocess_data(dataset):
     """Preprocess the data and perform train-test split."""
     try: 
-        X = dataset['Query'].values
-        y = dataset['Label'].values
+        X = dataset[QUERY_COLUMN].values
+        y = dataset[LABEL_COLUMN].values
         
         # Validate that we have at least some samples of each class
         unique_labels = np.unique(y)
@@ -60,16 +72,33 @@ def preprocess_data(dataset):
         print(f"Error preprocessing data: {str(e)}")
         raise
 
+def fit_tfidf(X_train, X_test):
+    """Fit the TF-IDF features on the training queries and transform both splits."""
+    # Character n-grams are hashed into a fixed 2**18 columns instead of
+    # building a vocabulary dict, so only the idf weights are learned;
+    # TfidfTransformer's defaults (smooth idf, l2 norm) match what
+    # TfidfVectorizer applied.
+    vectorizer = make_pipeline(
+        HashingVectorizer(analyzer='char_wb', ngram_range=(3, 5), n_features=2**18,
+                          alternate_sign=False, norm=None, dtype=np.float32),
+        TfidfTransformer()
+    )
+    # float32 halves the sparse data the solver scans; older TfidfTransformer
+    # releases return float64 regardless of the input dtype
+    X_train_tfidf = vectorizer.fit_transform(X_train).astype(np.float32, copy=False)
+    X_test_tfidf = vectorizer.transform(X_test).astype(np.float32, copy=False)
+    return vectorizer, X_train_tfidf, X_test_tfidf
+
 def train_model(X_train, X_test, y_train, y_test):
     """Train the model and make predictions."""
     try:
         # Create and fit TF-IDF vectorizer
-        vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(3, 5))
-        X_train_tfidf = vectorizer.fit_transform(X_train)
-        X_test_tfidf = vectorizer.transform(X_test)
+        vectorizer, X_train_tfidf, X_test_tfidf = fit_tfidf(X_train, X_test)
         
-        # Train classifier
+        # Train classifier. SAGA works on the float32 sparse matrix as is (lbfgs
+        # upcasts it to float64) and is fast on l2-normalized TF-IDF rows.
         classifier = LogisticRegression(class_weight='balanced', 
+                                      solver='saga',
                                       random_state=0,
                                       max_iter=1000)  # Increased max_iter to ensure convergence
         classifier.fit(X_train_tfidf, y_train)
@@ -89,26 +118,52 @@ def evaluate_model(y_test, y_pred, save_path='confusion_matrix.png'):
         accuracy = accuracy_score(y_test, y_pred)
         print(f'Model Accuracy: {accuracy:.4f}')
         
-        # Create confusion matrix
-        cm = confusion_matrix(y_test, y_pred)
-        plt.figure(figsize=(8, 6))
-        sns.heatmap(cm, annot=True, fmt='d', cmap='Blues')
-        plt.title('Confusion Matrix')
-        plt.ylabel('True Label')
-        plt.xlabel('Predicted Label')
-        
-        # Ensure the directory exists
-        os.makedirs(os.path.dirname(save_path) if os.path.dirname(save_path) else '.', exist_ok=True)
-        
-        plt.savefig(save_path)
-        plt.close()
+        # Create confusion matrix (plotting libraries are only loaded when saving one)
+        if save_path:
+            import matplotlib
+            matplotlib.use('Agg')  # File output only; skip GUI backend probing
+            import matplotlib.pyplot as plt
+            import seaborn as sns
+            
+            cm = confusion_matrix(y_test, y_pred)
+            plt.figure(figsize=(8, 6))
+            sns.heatmap(cm, annot=True, fmt='d', cmap='Blues')
+            plt.title('Confusion Matrix')
+            plt.ylabel('True Label')
+            plt.xlabel('Predicted Label')
+            
+            # Ensure the directory exists
+            os.makedirs(os.path.dirname(save_path) if os.path.dirname(save_path) else '.', exist_ok=True)
+            
+            plt.savefig(save_path)
+            plt.close()
         
         return accuracy
     except Exception as e:
         print(f"Error during model evaluation: {str(e)}")
         raise
 
-def main():
+def save_model(vectorizer, classifier, model_path):
+    """Save the fitted vectorizer and classifier together."""
+    try:
+        # Uncompressed, so the idf and coefficient arrays can be memory-mapped on load
+        joblib.dump({'vectorizer': vectorizer, 'classifier': classifier}, model_path, compress=0)
+        print(f"Model saved to: {model_path}")
+    except Exception as e:
+        print(f"Error saving model: {str(e)}")
+        raise
+
+def load_model(model_path):
+    """Load a saved vectorizer and classifier; numpy arrays are memory-mapped, not copied."""
+    try:
+        model_data = joblib.load(model_path, mmap_mode='r')
+        return model_data['vectorizer'], model_data['classifier']
+    except Exception as e:
+        print(f"Error loading model: {str(e)}")
+        raise
+
+def main(model_path=None):
+    """Train and evaluate the model; it is saved to model_path only when one is given."""
     try:
         # Define file paths and try different possible locations using absolute paths
         script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -144,6 +199,15 @@ def main():
         print("Evaluating model...")
         accuracy = evaluate_model(y_test, y_pred)
         
+        # Save model
+        if model_path is not None:
+            save_model(vectorizer, classifier, model_path)
+            # Read it back, so a model that does not round-trip fails here
+            # rather than in whatever loads it later
+            loaded_vectorizer, loaded_classifier = load_model(model_path)
+            if not np.array_equal(loaded_classifier.predict(loaded_vectorizer.transform(X_test)), y_pred):
+                raise ValueError("Saved model predictions differ from the trained model")
+        
         print("Process completed successfully!")
         print(f"Final model accuracy: {accuracy:.4f}")
         
@@ -154,4 +218,11 @@ def main():
         return None, None
 
 if __name__ == "__main__":
-    vectorizer, classifier = main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train and evaluate the SQL injection classifier.")
+    parser.add_argument(
+        '--save', nargs='?', metavar='PATH',
+        const=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sql_injection_model.joblib'),
+        help="save the fitted model (default path: sql_injection_model.joblib next to this script)"
+    )
+    args = parser.parse_args()
+    vectorizer, classifier = main(args.save)
\ No newline at end of file
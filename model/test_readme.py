@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Tests for the TF-IDF training script (readme.py)
+"""
+
+import os
+import sys
+
+import pytest
+
+# readme.py exits on import when its dependencies are missing
+for package in ('numpy', 'pandas', 'sklearn', 'joblib'):
+    pytest.importorskip(package)
+
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+import readme
+
+
+def test_saved_model_round_trips(tmp_path):
+    """A saved model loads back and predicts exactly what the trained one did."""
+    X_train = np.array([
+        "SELECT name FROM users WHERE id = 1",
+        "UPDATE products SET price = 10 WHERE id = 2",
+        "SELECT * FROM orders",
+        "INSERT INTO logs (message) VALUES ('ok')",
+        "' OR 1=1 --",
+        "admin'; DROP TABLE users; --",
+        "1 UNION SELECT username, password FROM admin",
+        "' AND SLEEP(5) --",
+    ], dtype=object)
+    y_train = np.array([0, 0, 0, 0, 1, 1, 1, 1])
+    X_test = np.array(["SELECT id FROM users", "x' OR '1'='1", "1; DROP TABLE logs"], dtype=object)
+    
+    vectorizer, classifier, y_pred = readme.train_model(X_train, X_test, y_train, None)
+    
+    model_path = str(tmp_path / 'sql_injection_model.joblib')
+    readme.save_model(vectorizer, classifier, model_path)
+    loaded_vectorizer, loaded_classifier = readme.load_model(model_path)
+    
+    assert np.array_equal(loaded_classifier.predict(loaded_vectorizer.transform(X_test)), y_pred)
+    assert np.allclose(
+        loaded_classifier.decision_function(loaded_vectorizer.transform(X_test)),
+        classifier.decision_function(vectorizer.transform(X_test))
+    )